@@ -0,0 +1,252 @@
+# ai_recommender.py — Featherless AI recommendations with caching and request coalescing
+import json
+import os
+import time
+
+import streamlit as st
+
+from cache import CACHE_DIR, MISSING, SingleFlight, TTLCache, TieredCache, open_disk_cache
+from metrics import SPAN_BUCKETS, counter, enabled, gauge, histogram, span
+from model import CATEGORIES, get_recommendations
+from resilience import CircuitBreaker, CircuitOpenError, call_with_retries, make_session
+
+FEATHERLESS_BASE_URL = os.environ.get("FEATHERLESS_BASE_URL", "https://api.featherless.ai/v1")
+FEATHERLESS_URL = f"{FEATHERLESS_BASE_URL}/chat/completions"
+FEATHERLESS_MODEL = "meta-llama/Llama-3.3-70B-Instruct"
+FEATHERLESS_POOL_SIZE = int(os.environ.get("FEATHERLESS_POOL_SIZE", "10"))
+FEATHERLESS_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+
+# One keep-alive pool shared by every session; while the breaker is open we
+# go straight to the rule-based fallback instead of waiting out the timeout
+_session = None
+breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+request_latency = histogram("carbon_lens_featherless_request_seconds",
+                            "Featherless HTTP attempt latency, retries included")
+gauge("carbon_lens_featherless_breaker_state",
+      lambda: {state: int(breaker.state == state) for state in (breaker.CLOSED, breaker.OPEN, breaker.HALF_OPEN)},
+      "Featherless circuit breaker state (1 for the current one)", label="state")
+gauge("carbon_lens_featherless_breaker_trips_total", lambda: breaker.trips,
+      "Times the Featherless circuit breaker opened", kind="counter")
+gauge("carbon_lens_featherless_breaker_rejected_total", lambda: breaker.rejected,
+      "Featherless calls refused while the circuit was open", kind="counter")
+
+# Where each answer came from: cache, featherless, fallback (rule-based) or error (stream failed)
+ai_answers = counter("carbon_lens_ai_recommendations_total", "Recommendation answers by source")
+first_line_latency = histogram("carbon_lens_llm_first_line_seconds",
+                               "Time until the first streamed recommendation line", SPAN_BUCKETS)
+
+# Breakdowns within the same 50 kg bucket per category share one cached answer
+QUANTUM_KG = 50
+
+AI_CACHE_PATH = os.environ.get(
+    "CARBON_LENS_AI_CACHE", os.path.join(CACHE_DIR, "ai_recommendations.sqlite3")
+)
+recommendation_cache = TieredCache(
+    TTLCache(maxsize=2048, ttl=24 * 3600),
+    open_disk_cache(AI_CACHE_PATH, "recommendations", ttl=7 * 24 * 3600)
+    if AI_CACHE_PATH != "off" else None,
+)
+_inflight = SingleFlight()
+
+
+def get_api_key():
+    """Featherless key from the environment, falling back to Streamlit secrets"""
+    return os.environ.get("FEATHERLESS_API_KEY") or st.secrets["FEATHERLESS_API_KEY"]
+
+
+def cache_key(breakdown, total, lang="en"):
+    """Quantized breakdown vector + language, e.g. 'en|1800|0|350|...'"""
+    values = [total] + [breakdown.get(name, 0) for name in CATEGORIES]
+    return "|".join([lang] + [str(int(round(v / QUANTUM_KG)) * QUANTUM_KG) for v in values])
+
+
+def build_prompt(breakdown, total, lang="en"):
+    top_category = max(breakdown, key=breakdown.get)
+    prompt = f"""You are a carbon footprint expert for India. A user has the following annual carbon emissions:
+
+Total: {total} kg CO2/year
+Transport: {breakdown.get('🚗 Transport', 0)} kg
+Energy: {breakdown.get('⚡ Energy', 0)} kg
+Food: {breakdown.get('🍽️ Food', 0)} kg
+Water: {breakdown.get('💧 Water', 0)} kg
+Shopping: {breakdown.get('🛍️ Shopping', 0)} kg
+Waste: {breakdown.get('🗑️ Waste', 0)} kg
+
+India average: 1800 kg/year. Global average: 4000 kg/year.
+Their highest emission category is: {top_category}
+
+Give exactly 5 specific, actionable recommendations for an Indian user to reduce their carbon footprint.
+Focus on the highest emission category first.
+Each recommendation should be practical, India-specific, and include estimated CO2 savings.
+Format each as a single line starting with an emoji."""
+    if lang == "ta":
+        prompt += "\nWrite the recommendations in Tamil."
+    return prompt
+
+
+def _request_kwargs(breakdown, total, lang, stream=False):
+    payload = {
+        "model": FEATHERLESS_MODEL,
+        "messages": [{"role": "user", "content": build_prompt(breakdown, total, lang)}],
+        "max_tokens": 500,
+        "temperature": 0.7
+    }
+    if stream:
+        payload["stream"] = True
+    return {
+        "headers": {
+            "Authorization": f"Bearer {get_api_key()}",
+            "Content-Type": "application/json"
+        },
+        "json": payload,
+        "timeout": FEATHERLESS_TIMEOUT,
+        "stream": stream,
+    }
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = make_session(FEATHERLESS_POOL_SIZE)
+    return _session
+
+
+def _post(**kwargs):
+    """POST through the pooled session, retry policy and circuit breaker"""
+    if not breaker.allow():
+        raise CircuitOpenError("Featherless circuit is open")
+    try:
+        response = call_with_retries(
+            lambda: get_session().post(FEATHERLESS_URL, **kwargs), histogram=request_latency
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    if response.status_code == 200:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    return response
+
+
+def fetch_ai_recommendations(breakdown, total, lang="en"):
+    """One uncached Featherless call; returns the recommendation lines or None"""
+    try:
+        with span("llm"):
+            response = _post(**_request_kwargs(breakdown, total, lang))
+            if response.status_code == 200:
+                ai_text = response.json()["choices"][0]["message"]["content"]
+                return [line.strip() for line in ai_text.strip().split("\n") if line.strip()]
+        return None
+    except Exception as e:
+        return None
+
+
+def iter_sse_text(response):
+    """Yield content deltas from an OpenAI-style chat-completions SSE stream"""
+    for raw in response.iter_lines(decode_unicode=True):
+        if not raw or not raw.startswith("data:"):
+            continue
+        data = raw[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        delta = json.loads(data)["choices"][0].get("delta", {})
+        if delta.get("content"):
+            yield delta["content"]
+
+
+def _stream_fetch(key, breakdown, total, lang):
+    """One streamed Featherless call (the single-flight leader); caches the finished answer"""
+    # Re-check inside the single flight: a previous leader may have just filled it
+    cached = recommendation_cache.get(key)
+    if cached is not MISSING:
+        yield from cached
+        return
+
+    lines = []
+    buffer = ""
+    start = time.perf_counter()
+    # Same span as the blocking call, so streamed traffic shows up in llm latency and errors
+    with span("llm"), _post(**_request_kwargs(breakdown, total, lang, stream=True)) as response:
+        response.raise_for_status()
+        try:
+            for text in iter_sse_text(response):
+                buffer += text
+                *complete, buffer = buffer.split("\n")
+                for line in complete:
+                    if line.strip():
+                        lines.append(line.strip())
+                        if len(lines) == 1 and enabled():
+                            first_line_latency.observe(time.perf_counter() - start)
+                        yield lines[-1]
+        except (OSError, ValueError, KeyError):
+            breaker.record_failure()
+            raise
+    if buffer.strip():
+        lines.append(buffer.strip())
+        yield lines[-1]
+    if lines:
+        recommendation_cache.set(key, lines)
+
+
+def stream_ai_recommendations(breakdown, total, lang="en"):
+    """Yield each complete recommendation line as soon as it has streamed in.
+
+    Cached answers are replayed immediately, and concurrent identical
+    requests share one upstream stream — followers get the leader's lines
+    as they arrive. A fully streamed answer is cached for next time. Raises
+    on HTTP or network errors (after any lines already yielded) so the
+    caller can keep showing the rule-based fallback.
+    """
+    key = cache_key(breakdown, total, lang)
+    cached = recommendation_cache.get(key)
+    if cached is not MISSING:
+        ai_answers.inc(source="cache")
+        yield from cached
+        return
+    try:
+        yield from _inflight.stream(key, _stream_fetch, key, breakdown, total, lang)
+    except Exception:
+        ai_answers.inc(source="error")
+        raise
+    ai_answers.inc(source="featherless")
+
+
+def _cached_fetch(key, breakdown, total, lang):
+    # Re-check inside the single flight: a previous leader may have just filled it
+    lines = recommendation_cache.get(key)
+    if lines is MISSING:
+        lines = fetch_ai_recommendations(breakdown, total, lang)
+        if lines:
+            recommendation_cache.set(key, lines)
+    return lines
+
+
+def get_ai_recommendations(breakdown, total, lang="en"):
+    """Get AI-powered recommendations from Featherless AI.
+
+    Answers are cached per quantized breakdown and language, and concurrent
+    identical requests share one upstream call. Falls back to the rule-based
+    model.get_recommendations (uncached) when the API fails.
+    """
+    key = cache_key(breakdown, total, lang)
+    lines = recommendation_cache.get(key)
+    if lines is not MISSING:
+        ai_answers.inc(source="cache")
+        return lines, True
+    lines = _inflight.do(key, _cached_fetch, key, breakdown, total, lang)
+    if lines:
+        ai_answers.inc(source="featherless")
+        return lines, True
+    ai_answers.inc(source="fallback")
+    return get_recommendations(breakdown, total), False
+
+
+def ai_client_stats():
+    """Breaker state, request latency histogram and cache counters for monitoring"""
+    return {
+        "breaker": breaker.stats(),
+        "latency": request_latency.snapshot(),
+        "cache": recommendation_cache.stats(),
+        "coalesced": _inflight.coalesced,
+    }
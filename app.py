@@ -1,67 +1,40 @@
 # app.py — Carbon Lens Tracker (Beautiful Frontend Version)
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-from model import calculate_carbon, get_recommendations
-from transport_tracker import calculate_distance, calculate_transport_emission, EMISSION_FACTORS
-import requests
-import json
-from gtts import gTTS
+import charts
+from esg import ESGAggregator, esg_metrics
+from export import RESULTS_DIR, results_table, write_results
+from factors import registry as factor_registry
+from grid import get_grid
+from history import CATEGORY_COLUMNS, new_history_key, open_history_store, user_key
+from metrics import RerunTimer, maybe_write_textfile
+from model import CATEGORIES, ActivityRecord, calculate_record, get_recommendations
+from transport_tracker import calculate_distance_async, calculate_transport_emission, suggest_locations, EMISSION_FACTORS, FALLBACK_VEHICLE_KEY, VEHICLE_FACTOR_KEYS
+from whatif import MEAT_MEALS, PRIVATE_TRANSPORT, WhatIf, activities_from_inputs
+from optimizer import optimize
+from uncertainty import uncertainty_bands
+from ai_recommender import stream_ai_recommendations
+from voice import generate_voice_summary, prerender_voice_summary
+import asyncio
 import io
-import base64
+import logging
 
-# ─── FEATHERLESS AI ───────────────────────────────────────────────────────────
-def get_ai_recommendations(breakdown, total):
-    """Get AI-powered recommendations from Featherless AI"""
-    try:
-        api_key = st.secrets["FEATHERLESS_API_KEY"]
-        
-        top_category = max(breakdown, key=breakdown.get)
-        
-        prompt = f"""You are a carbon footprint expert for India. A user has the following annual carbon emissions:
-
-Total: {total} kg CO2/year
-Transport: {breakdown.get('🚗 Transport', 0)} kg
-Energy: {breakdown.get('⚡ Energy', 0)} kg
-Food: {breakdown.get('🍽️ Food', 0)} kg
-Water: {breakdown.get('💧 Water', 0)} kg
-Shopping: {breakdown.get('🛍️ Shopping', 0)} kg
-Waste: {breakdown.get('🗑️ Waste', 0)} kg
-
-India average: 1800 kg/year. Global average: 4000 kg/year.
-Their highest emission category is: {top_category}
-
-Give exactly 5 specific, actionable recommendations for an Indian user to reduce their carbon footprint.
-Focus on the highest emission category first.
-Each recommendation should be practical, India-specific, and include estimated CO2 savings.
-Format each as a single line starting with an emoji."""
-
-        response = requests.post(
-            "https://api.featherless.ai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "meta-llama/Llama-3.3-70B-Instruct",
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 500,
-                "temperature": 0.7
-            },
-            timeout=15
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            ai_text = result["choices"][0]["message"]["content"]
-            lines = [line.strip() for line in ai_text.strip().split("\n") if line.strip()]
-            return lines, True
-        else:
-            return get_recommendations(breakdown, total), False
-            
-    except Exception as e:
-        return get_recommendations(breakdown, total), False
+log = logging.getLogger(__name__)
+
+# Same inputs → same breakdown; cache_data hands back a copy, so callers may mutate it
+calculate_record_cached = st.cache_data(max_entries=256, show_spinner=False)(calculate_record)
+
+
+
+@st.cache_data(max_entries=8, show_spinner="Scoring employee inputs…")
+def aggregate_employee_csv(data, factor_set):
+    """Company ESG figures from an uploaded per-employee / per-department CSV"""
+    return ESGAggregator(factor_set).add_csv(io.BytesIO(data)).result()
+
+# Footprint history (opt-in via CARBON_LENS_HISTORY), opened once per process
+history_store = st.cache_resource(show_spinner=False)(open_history_store)()
+
+# Per-rerun timing breakdown, shown at the bottom of the page with ?timings=1
+rerun_timer = RerunTimer()
 
 # ─── TAMIL TRANSLATIONS ──────────────────────────────────────────────────────
 TAMIL = {
@@ -341,33 +314,6 @@ TEXT = {
     }
 }
 
-# ─── GTTS VOICE (FREE - NO API KEY) ─────────────────────────────────────────
-def generate_voice_summary(total, breakdown, lang="en"):
-    """Generate voice summary using gTTS — free, no API key needed"""
-    try:
-        top_category = max(breakdown, key=breakdown.get)
-        top_value = breakdown[top_category]
-        top_name = top_category.replace("🚗","").replace("⚡","").replace("🍽️","").replace("💧","").replace("🛍️","").replace("🗑️","").strip()
-
-        if lang == "ta":
-            text = f"""உங்கள் வருடாந்திர கார்பன் கால்சுவடு {int(total)} கிலோகிராம் CO2 ஆகும்.
-            உங்கள் மிக அதிக உமிழ்வு பிரிவு {top_name} ஆகும், இது {int(top_value)} கிலோகிராம்.
-            உங்கள் கார்பன் கால்சுவட்டை சமன் செய்ய ஆண்டுக்கு {int(total/22)} மரங்கள் நடவேண்டும்.
-            கீழே உள்ள பரிந்துரைகளை பின்பற்றுங்கள்!"""
-        else:
-            text = f"""Your annual carbon footprint is {int(total)} kilograms of CO2 per year.
-            Your highest emission source is {top_name} at {int(top_value)} kilograms per year.
-            To offset your footprint, you need to plant {int(total/22)} trees every year.
-            Check the recommendations below to reduce your carbon footprint!"""
-
-        tts = gTTS(text=text, lang=lang, slow=False)
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        return audio_buffer.read(), True
-    except Exception as e:
-        return str(e), False
-
 # ─── PAGE CONFIG ──────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Carbon Lens Tracker", page_icon="🌍", layout="wide")
 
@@ -660,6 +606,23 @@ with st.sidebar:
     st.metric(T["global_avg"], T["global_metric"])
     st.metric(T["paris"], T["paris_metric"])
     st.markdown(f"<p style='color: #80cfd850; font-size: 11px;'>{T['source']}</p>", unsafe_allow_html=True)
+    factor_set = st.selectbox("📐 Emission factors", factor_registry.names(),
+                              index=factor_registry.names().index(factor_registry.default_name),
+                              format_func=lambda name: f"{name} ({factor_registry.get(name).version})")
+    # History is keyed on the signed-in account (when auth is configured) or a random
+    # history key, never on a typed name or email that anyone could enter
+    history_user = ""
+    if history_store and getattr(st.user, "is_logged_in", False):
+        account = st.user.to_dict()
+        history_user = user_key(account.get("sub") or account.get("email", ""))
+        st.caption("📈 Saving your history to your account")
+    elif history_store:
+        history_key = st.text_input("🔑 History key (saves your history)", "", type="password").strip()
+        if history_key:
+            history_user = user_key(history_key)
+        else:
+            suggested = st.session_state.setdefault("new_history_key", new_history_key())
+            st.caption(f"New here? Use `{suggested}` and keep it safe — it's the only way back to your trend.")
 
     st.markdown("---")
     st.markdown(f"<p style='color: #00ff88; font-family: Orbitron, sans-serif; font-size: 13px;'>{T['powered_by']}</p>", unsafe_allow_html=True)
@@ -697,8 +660,14 @@ with tab1:
     col1, col2 = st.columns(2)
     with col1:
         from_location = st.text_input(T["from_loc"], placeholder="e.g. Coimbatore Railway Station", key="from_loc")
+        from_suggestions = suggest_locations(from_location)
+        if from_suggestions and from_location not in from_suggestions:
+            st.caption("💡 " + " · ".join(from_suggestions))
     with col2:
         to_location = st.text_input(T["to_loc"], placeholder="e.g. Karunya University", key="to_loc")
+        to_suggestions = suggest_locations(to_location)
+        if to_suggestions and to_location not in to_suggestions:
+            st.caption("💡 " + " · ".join(to_suggestions))
 
     col1, col2 = st.columns(2)
     with col1:
@@ -714,13 +683,14 @@ with tab1:
             to_location = to_val
         if from_location and to_location:
             with st.spinner("🗺️ Finding locations on OpenStreetMap..."):
-                distance, error = calculate_distance(from_location, to_location)
+                distance, error = asyncio.run(calculate_distance_async(from_location, to_location))
             if error:
                 st.error(f"❌ {error} — Try a more specific location name")
             else:
-                emission = calculate_transport_emission(distance, vehicle_type, trips_per_day)
+                emission = calculate_transport_emission(distance, vehicle_type, trips_per_day, factor_set)
                 st.session_state.transport_emission = emission
                 st.session_state.calculated_distance = distance
+                st.session_state.commute = (VEHICLE_FACTOR_KEYS.get(vehicle_type, FALLBACK_VEHICLE_KEY), distance * trips_per_day)
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("📏 Distance", f"{distance} km")
@@ -760,6 +730,15 @@ with tab2:
     with col2:
         png_scm = st.slider(T["piped_gas"], 0, 50, 0)
         generator_ltrs = st.slider(T["gen_diesel"], 0, 50, 0)
+    pincode = st.text_input("📮 Pincode (optional — uses your state / DISCOM grid factor)", max_chars=6)
+    grid_factor = None
+    if pincode.strip():
+        grid_region = get_grid().region(pincode)
+        if grid_region:
+            grid_factor = get_grid().factor(pincode)
+            st.caption(f"⚡ {get_grid().describe(grid_region)}: {grid_factor} kg CO₂/kWh")
+        else:
+            st.caption("⚠️ Pincode not recognised — using the national grid factor")
 
 # ─── FOOD TAB ─────────────────────────────────────────────────────────────────
 with tab3:
@@ -840,6 +819,13 @@ with tab7:
     with col2:
         esg_employees = st.number_input(T["esg_employees"], 1, 500000, 100, key="esg_employees")
         esg_year = st.selectbox(T["esg_year"], ["2025-26","2024-25","2023-24"])
+    esg_upload = st.file_uploader(
+        "📄 Employee inputs CSV (optional)", type="csv",
+        help="One row per employee or department, with the calculator's input names as columns "
+             "(e.g. electricity_kwh, car_type, car_km) plus optional department, employees and pincode. "
+             "Replaces the headcount × your footprint estimate.")
+
+rerun_timer.lap("inputs")
 
 # ─── CALCULATE BUTTON ─────────────────────────────────────────────────────────
 st.markdown("<br>", unsafe_allow_html=True)
@@ -851,18 +837,18 @@ with col2:
 if calculate:
     transport_override = st.session_state.transport_emission if st.session_state.transport_emission > 0 else None
 
-    # Pass car_km=0 always — transport handled separately to avoid double counting
-    total, breakdown = calculate_carbon(
-        "None", 0, 0, 0, 0, 0,
-        domestic_flights, domestic_flight_hrs,
-        international_flights, international_flight_hrs,
-        electricity_kwh, lpg_cylinders, png_scm, generator_ltrs,
-        beef_mutton_meals, chicken_meals, fish_meals,
-        eggs_per_day, veg_meals, dairy_litres, food_waste_kg,
-        water_litres, shower_mins, washing_cycles,
-        clothing_items, electronics_items, online_orders,
-        landfill_kg, recycled_kg, composting_kg
+    # car_type and car_km stay at their defaults — transport handled separately to avoid double counting
+    record = ActivityRecord(
+        domestic_flights=domestic_flights, domestic_flight_hrs=domestic_flight_hrs,
+        international_flights=international_flights, international_flight_hrs=international_flight_hrs,
+        electricity_kwh=electricity_kwh, lpg_cylinders=lpg_cylinders, png_scm=png_scm, generator_ltrs=generator_ltrs,
+        beef_mutton_meals=beef_mutton_meals, chicken_meals=chicken_meals, fish_meals=fish_meals,
+        eggs_per_day=eggs_per_day, veg_meals=veg_meals, dairy_litres=dairy_litres, food_waste_kg=food_waste_kg,
+        water_litres=water_litres, shower_mins=shower_mins, washing_cycles=washing_cycles,
+        clothing_items=clothing_items, electronics_items=electronics_items, online_orders=online_orders,
+        landfill_kg=landfill_kg, recycled_kg=recycled_kg, composting_kg=composting_kg,
     )
+    total, breakdown = calculate_record_cached(record, factors=factor_set, grid_factor=grid_factor)
 
     # Add transport only from auto-calculator — no double counting
     if transport_override:
@@ -875,6 +861,22 @@ if calculate:
     st.session_state.results_total = total
     st.session_state.results_breakdown = breakdown
     st.session_state.results_ready = True
+    # Baseline for the what-if savings below; the commute enters as daily km in its vehicle
+    activities = activities_from_inputs(**record._asdict())
+    commute = st.session_state.commute if transport_override and "commute" in st.session_state else None
+    if commute:
+        commute_key, commute_km = commute
+        activities[commute_key] = activities.get(commute_key, 0) + commute_km
+    st.session_state.results_whatif = WhatIf(activities, factor_set, grid_factor)
+    st.session_state.results_bands = uncertainty_bands(st.session_state.results_whatif)
+    prerender_voice_summary(total, breakdown, st.session_state.get("lang", "en"))
+    if history_user:
+        history_store.append(history_user, total, breakdown, factor_set=factor_set)
+    if RESULTS_DIR:
+        write_results(results_table(record._asdict(), total, breakdown, esg_employees,
+                                    factor_set=factor_set, commute=commute), RESULTS_DIR)
+
+    rerun_timer.lap("calculate")
 
 # Show results if calculated
 if "results_ready" in st.session_state and st.session_state.results_ready:
@@ -976,67 +978,36 @@ if "results_ready" in st.session_state and st.session_state.results_ready:
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # ─── CHARTS ───────────────────────────────────────────────────────────────
-    df = pd.DataFrame({
-        "Category": list(breakdown.keys()),
-        "CO₂ (kg/year)": list(breakdown.values())
-    })
+    rerun_timer.lap("summary")
 
+    # ─── CHARTS ───────────────────────────────────────────────────────────────
+    breakdown_items = tuple(breakdown.items())
     col1, col2 = st.columns(2)
     with col1:
-        fig = px.pie(df, values="CO₂ (kg/year)", names="Category",
-                     title="📊 Emission Sources Breakdown",
-                     color_discrete_sequence=["#00ff88", "#00e5ff", "#ffaa00", "#ff6b6b", "#a855f7", "#f97316"])
-        fig.update_traces(textposition='inside', textinfo='percent+label',
-                          textfont=dict(color='white', size=12))
-        fig.update_layout(
-            paper_bgcolor='#061a24',
-            plot_bgcolor='#061a24',
-            font=dict(color='#80cfd8'),
-            title_font=dict(color='#00e5ff', size=14),
-            legend=dict(font=dict(color='#80cfd8'))
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        charts.render(charts.breakdown_pie(breakdown_items))
 
     with col2:
-        fig2 = px.bar(df, x="Category", y="CO₂ (kg/year)",
-                      title="📈 Emissions by Category",
-                      color="CO₂ (kg/year)",
-                      color_continuous_scale=[[0, "#00ff88"], [0.5, "#ffaa00"], [1, "#ff4444"]])
-        fig2.update_layout(
-            paper_bgcolor='#061a24',
-            plot_bgcolor='#061a24',
-            font=dict(color='#80cfd8'),
-            title_font=dict(color='#00e5ff', size=14),
-            xaxis=dict(gridcolor='rgba(255,255,255,0.07)', tickangle=-30),
-            yaxis=dict(gridcolor='rgba(255,255,255,0.07)')
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        charts.render(charts.breakdown_bar(breakdown_items))
 
     # ─── BENCHMARK CHART ──────────────────────────────────────────────────────
-    compare_df = pd.DataFrame({
-        "": ["🧑 You", "🇮🇳 India Avg", "🌍 Global Avg", "🎯 Paris Target"],
-        "CO₂ (kg/year)": [total, 1800, 4000, 2300],
-        "Color": ["#00e5ff", "#00ff88", "#ff4444", "#ffaa00"]
-    })
-    fig3 = go.Figure(go.Bar(
-        x=compare_df[""],
-        y=compare_df["CO₂ (kg/year)"],
-        marker_color=compare_df["Color"],
-        text=compare_df["CO₂ (kg/year)"].apply(lambda x: f"{x:,.0f} kg"),
-        textposition='outside',
-        textfont=dict(color='white')
-    ))
-    fig3.update_layout(
-        title="🌍 Your Footprint vs World Benchmarks",
-        paper_bgcolor='#061a24',
-        plot_bgcolor='#061a24',
-        font=dict(color='#80cfd8'),
-        title_font=dict(color='#00e5ff', size=14),
-        xaxis=dict(gridcolor='rgba(255,255,255,0.07)'),
-        yaxis=dict(gridcolor='rgba(255,255,255,0.07)', title="kg CO₂/year")
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    # 90% range from sampling every emission factor (the commute included)
+    total_band = st.session_state.results_bands["total"]
+    charts.render(charts.benchmark_bar(total, (total_band[5], total_band[95])))
+    st.caption(f"📏 90% range given emission-factor uncertainty: {total_band[5]:,.0f} – {total_band[95]:,.0f} kg CO₂/year")
+    rerun_timer.lap("charts")
+
+    # ─── HISTORY ──────────────────────────────────────────────────────────────
+    if history_user:
+        trend = history_store.monthly_trend(history_user)
+        if len(trend) > 1:
+            charts.render(charts.monthly_trend(tuple((row["month"], row["total"]) for row in trend)))
+            deltas = history_store.category_deltas(history_user)
+            cols = st.columns(len(CATEGORY_COLUMNS))
+            for col, column, label in zip(cols, CATEGORY_COLUMNS, CATEGORIES):
+                col.metric(label, f"{trend[-1][column]:,.0f} kg", f"{deltas[label]:+,.0f} kg vs last month", delta_color="inverse")
+        elif trend:
+            st.caption(f"📈 Saved to your history ({trend[0]['entries']} this month) — come back next month to see your trend")
+        rerun_timer.lap("history")
 
     # ─── RECOMMENDATIONS ──────────────────────────────────────────────────────
     st.markdown("<br>", unsafe_allow_html=True)
@@ -1052,46 +1023,70 @@ if "results_ready" in st.session_state and st.session_state.results_ready:
     </div>
     """, unsafe_allow_html=True)
     
-    with st.spinner("🤖 Getting AI-powered recommendations from Featherless AI..."):
-        recommendations, is_ai = get_ai_recommendations(breakdown, total)
-    
+    # Rule-based recommendations show instantly; AI lines replace them as they stream in
+    status_slot = st.empty()
+    recs_slot = st.empty()
+    status_slot.info("🤖 Getting AI-powered recommendations from Featherless AI...")
+    with recs_slot.container():
+        for rec in get_recommendations(breakdown, total):
+            st.success(rec)
+
+    ai_lines = []
+    is_ai = False
+    try:
+        for line in stream_ai_recommendations(breakdown, total, st.session_state.get("lang", "en")):
+            ai_lines.append(line)
+            with recs_slot.container():
+                for rec in ai_lines:
+                    st.success(rec)
+        is_ai = bool(ai_lines)
+    except Exception as e:
+        log.warning("AI recommendation stream failed after %d lines: %s", len(ai_lines), e)
+        if ai_lines:
+            # Don't leave a half-streamed answer on screen
+            with recs_slot.container():
+                for rec in get_recommendations(breakdown, total):
+                    st.success(rec)
+
     if is_ai:
-        st.success("✅ AI recommendations generated by Featherless AI — Llama 3.3 70B!")
-        
-        # Show proof of API call
-        with st.expander("🔍 View Featherless AI API Call Proof (for judges)"):
-            st.markdown("""
-            <div style='background: #020b12; border: 1px solid #00ff8844; border-radius: 8px; padding: 16px; font-family: monospace;'>
-            <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📡 API REQUEST SENT TO:</p>
-            <p style='color: #00ff88; font-size: 12px; margin: 0 0 12px 0;'>https://api.featherless.ai/v1/chat/completions</p>
-            <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>🤖 MODEL USED:</p>
-            <p style='color: #00ff88; font-size: 12px; margin: 0 0 12px 0;'>meta-llama/Llama-3.3-70B-Instruct</p>
-            <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📤 DATA SENT:</p>
-            <p style='color: #ffaa00; font-size: 12px; margin: 0 0 12px 0;'>User emission breakdown with all 6 categories</p>
-            <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📥 RESPONSE STATUS:</p>
-            <p style='color: #00ff88; font-size: 12px; margin: 0;'>✅ 200 OK — AI inference successful</p>
-            </div>
-            """, unsafe_allow_html=True)
+        with status_slot.container():
+            st.success("✅ AI recommendations generated by Featherless AI — Llama 3.3 70B!")
+
+            # Show proof of API call
+            with st.expander("🔍 View Featherless AI API Call Proof (for judges)"):
+                st.markdown("""
+                <div style='background: #020b12; border: 1px solid #00ff8844; border-radius: 8px; padding: 16px; font-family: monospace;'>
+                <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📡 API REQUEST SENT TO:</p>
+                <p style='color: #00ff88; font-size: 12px; margin: 0 0 12px 0;'>https://api.featherless.ai/v1/chat/completions</p>
+                <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>🤖 MODEL USED:</p>
+                <p style='color: #00ff88; font-size: 12px; margin: 0 0 12px 0;'>meta-llama/Llama-3.3-70B-Instruct</p>
+                <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📤 DATA SENT:</p>
+                <p style='color: #ffaa00; font-size: 12px; margin: 0 0 12px 0;'>User emission breakdown with all 6 categories</p>
+                <p style='color: #00e5ff; font-size: 12px; margin: 0 0 8px 0;'>📥 RESPONSE STATUS:</p>
+                <p style='color: #00ff88; font-size: 12px; margin: 0;'>✅ 200 OK — AI inference successful</p>
+                </div>
+                """, unsafe_allow_html=True)
             
-            # Show actual data sent
-            st.markdown("<p style='color: #00e5ff; font-size: 12px; margin-top: 12px;'>📊 ACTUAL EMISSION DATA SENT TO FEATHERLESS AI:</p>", unsafe_allow_html=True)
-            for cat, val in breakdown.items():
-                st.markdown(f"<p style='color: #80cfd8; font-size: 12px; margin: 2px 0;'>→ {cat}: <span style='color: #00ff88;'>{val:.2f} kg CO₂/year</span></p>", unsafe_allow_html=True)
-            st.markdown(f"<p style='color: #ffaa00; font-size: 13px; margin-top: 8px;'>→ Total sent: <b>{total:.2f} kg CO₂/year</b></p>", unsafe_allow_html=True)
+                # Show actual data sent
+                st.markdown("<p style='color: #00e5ff; font-size: 12px; margin-top: 12px;'>📊 ACTUAL EMISSION DATA SENT TO FEATHERLESS AI:</p>", unsafe_allow_html=True)
+                for cat, val in breakdown.items():
+                    st.markdown(f"<p style='color: #80cfd8; font-size: 12px; margin: 2px 0;'>→ {cat}: <span style='color: #00ff88;'>{val:.2f} kg CO₂/year</span></p>", unsafe_allow_html=True)
+                st.markdown(f"<p style='color: #ffaa00; font-size: 13px; margin-top: 8px;'>→ Total sent: <b>{total:.2f} kg CO₂/year</b></p>", unsafe_allow_html=True)
     else:
-        st.info("ℹ️ Showing smart recommendations")
-    
-    for rec in recommendations:
-        st.success(rec)
+        status_slot.info("ℹ️ Showing smart recommendations")
+
+    rerun_timer.lap("recommendations")
 
     # ─── SAVINGS CARDS ────────────────────────────────────────────────────────
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("<p style='font-family: Orbitron, sans-serif; color: #00e5ff; font-size: 16px; letter-spacing: 2px;'>💰 POTENTIAL ANNUAL SAVINGS</p>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
-    # Calculate actual savings based on user data
-    transport_saving = round(breakdown.get("🚗 Transport", 0) * 0.30)  # 30% saving by switching transport
-    energy_saving = round(breakdown.get("⚡ Energy", 0) * 0.50)        # 50% saving by solar
-    food_saving = round(breakdown.get("🍽️ Food", 0) * 0.40)           # 40% saving by reducing meat
+    # What-if savings from this user's own inputs: private transport → bus,
+    # 2 kW rooftop solar, and 4 meat meals a week swapped for vegetarian
+    whatif = st.session_state.results_whatif
+    transport_saving = round(whatif.savings(whatif.shift(PRIVATE_TRANSPORT, "bus_km")))
+    energy_saving = round(whatif.savings(whatif.solar(2)))
+    food_saving = round(whatif.savings(whatif.shift(MEAT_MEALS, "veg_meals", 4)))
 
     s1 = (T["switch_transport"], "போக்குவரத்து மாற்றுங்கள்")
     s2 = (T["install_solar"], "சோலார் பேனல் பொருத்துங்கள்")
@@ -1128,6 +1123,22 @@ if "results_ready" in st.session_state and st.session_state.results_ready:
         </div>
         """, unsafe_allow_html=True)
 
+    # ─── BEST NEXT STEPS ──────────────────────────────────────────────────────
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<p style='font-family: Orbitron, sans-serif; color: #00e5ff; font-size: 16px; letter-spacing: 2px;'>🎯 YOUR BEST NEXT STEPS</p>", unsafe_allow_html=True)
+    rank_by = st.radio("Rank by", ["effort", "cost"], horizontal=True, format_func=lambda p: "💪 Least effort" if p == "effort" else "💸 Least cost")
+    for step in optimize(whatif, top_n=5, per=rank_by):
+        cost_note = f" · ₹{step['cost_inr']:,} one-off" if step["cost_inr"] else ""
+        st.markdown(f"""
+        <div style='background: #00ff8808; border-left: 3px solid #00ff88; border-radius: 8px; padding: 10px 16px; margin: 6px 0;'>
+            <span style='color: #e0f7fa; font-size: 14px;'>{step['label']} — <b>{step['amount']:g} {step['unit']}</b></span>
+            <span style='color: #00ff88; font-size: 14px; font-weight: bold; float: right;'>-{step['saved_kg']:,.0f} kg CO₂/yr</span>
+            <br><span style='color: #80cfd8; font-size: 11px;'>effort {step['effort']:g}{cost_note}</span>
+        </div>
+        """, unsafe_allow_html=True)
+
+    rerun_timer.lap("savings")
+
     # ─── ESG REPORT DISPLAY ───────────────────────────────────────────────────
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("<p style='font-family: Orbitron, sans-serif; color: #00e5ff; font-size: 16px; letter-spacing: 2px;'>🏢 ESG CARBON DISCLOSURE REPORT</p>", unsafe_allow_html=True)
@@ -1143,14 +1154,22 @@ if "results_ready" in st.session_state and st.session_state.results_ready:
         co_industry = "Other"
         co_year = "2025-26"
 
-    # Calculations
-    company_total = round(total * co_employees)
-    scope1 = round((breakdown.get("🚗 Transport", 0)) * co_employees)
-    scope2 = round((breakdown.get("⚡ Energy", 0)) * co_employees)
-    scope3 = round((breakdown.get("🍽️ Food", 0) + breakdown.get("💧 Water", 0) + breakdown.get("🛍️ Shopping", 0) + breakdown.get("🗑️ Waste", 0)) * co_employees)
-    per_employee = round(total)
-    trees_company = int(company_total / 22)
-    esg_score = max(0, min(100, round(100 - (total / 60))))
+    # Calculations: scored employee inputs when uploaded, else headcount × this footprint
+    scored_upload = False
+    if esg_upload is not None:
+        try:
+            esg = aggregate_employee_csv(esg_upload.getvalue(), factor_set)
+            scored_upload = True
+        except Exception as e:
+            st.error(f"⚠️ Couldn't score {esg_upload.name}: {e}. Showing the headcount estimate instead.")
+    if scored_upload:
+        co_employees = esg["employees"]
+        company_breakdown = esg["categories"]
+    else:
+        esg = esg_metrics(total, breakdown, co_employees)
+        company_breakdown = {k: v * co_employees for k, v in breakdown.items()}
+    company_total, per_employee, trees_company, esg_score = esg["company_total"], esg["per_employee"], esg["trees"], esg["esg_score"]
+    scope1, scope2, scope3 = esg["scope1"], esg["scope2"], esg["scope3"]
 
     if esg_score >= 75:
         rating, rating_color, rating_bg = T["esg_rating_a"], "#00ff88", "#00ff8811"
@@ -1224,57 +1243,32 @@ if "results_ready" in st.session_state and st.session_state.results_ready:
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    if scored_upload:
+        pct = esg["percentiles"]
+        st.caption(f"👥 Per-employee spread: median {pct[50]:,.0f} kg · 10th–90th percentile "
+                   f"{pct[10]:,.0f} – {pct[90]:,.0f} kg CO₂/year ({esg['rows']:,} input rows)")
+        if esg["departments"]:
+            st.dataframe([
+                {"Department": name, "Employees": d["employees"], "Total (kg)": d["company_total"],
+                 "Scope 1": d["scope1"], "Scope 2": d["scope2"], "Scope 3": d["scope3"],
+                 "Per employee": d["per_employee"], "ESG score": d["esg_score"]}
+                for name, d in esg["departments"].items()
+            ], use_container_width=True, hide_index=True)
+
+    rerun_timer.lap("esg_report")
+
     # Charts
     col1, col2 = st.columns(2)
     with col1:
-        scope_df = pd.DataFrame({
-            "Scope": ["Scope 1 — Direct", "Scope 2 — Electricity", "Scope 3 — Value Chain"],
-            "kg CO₂": [scope1, scope2, scope3]
-        })
-        fig_scope = px.pie(scope_df, values="kg CO₂", names="Scope",
-            title=T["esg_chart1"],
-            color_discrete_sequence=["#ff4444", "#ffaa00", "#00e5ff"])
-        fig_scope.update_traces(textposition="inside", textinfo="percent+label", textfont=dict(color="white", size=12))
-        fig_scope.update_layout(paper_bgcolor="#061a24", plot_bgcolor="#061a24",
-            font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
-            legend=dict(font=dict(color="#80cfd8")))
-        st.plotly_chart(fig_scope, use_container_width=True)
+        charts.render(charts.scope_pie(scope1, scope2, scope3, T["esg_chart1"]))
 
     with col2:
-        cat_df = pd.DataFrame({
-            "Category": list(breakdown.keys()),
-            "kg CO₂": [v * co_employees for v in breakdown.values()]
-        })
-        fig_cat = px.pie(cat_df, values="kg CO₂", names="Category",
-            title=T["esg_chart2"],
-            color_discrete_sequence=["#00ff88","#00e5ff","#ffaa00","#ff6b6b","#a855f7","#f97316"])
-        fig_cat.update_traces(textposition="inside", textinfo="percent+label", textfont=dict(color="white", size=12))
-        fig_cat.update_layout(paper_bgcolor="#061a24", plot_bgcolor="#061a24",
-            font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
-            legend=dict(font=dict(color="#80cfd8")))
-        st.plotly_chart(fig_cat, use_container_width=True)
+        company_items = tuple(company_breakdown.items())
+        charts.render(charts.company_category_pie(company_items, T["esg_chart2"]))
 
     # Bar chart — compare vs benchmarks
-    bench_df = pd.DataFrame({
-        "": [f"🏢 {co_name[:15]}", "🇮🇳 India Avg", "🌍 Global Avg", "🎯 Paris Target"],
-        T["per_emp_yr"]: [per_employee, 1800, 4000, 2300],
-        "Color": ["#00e5ff", "#00ff88", "#ff4444", "#ffaa00"]
-    })
-    fig_bench = go.Figure(go.Bar(
-        x=bench_df[""],
-        y=bench_df[T["per_emp_yr"]],
-        marker_color=bench_df["Color"],
-        text=bench_df[T["per_emp_yr"]].apply(lambda x: f"{x:,} kg"),
-        textposition="outside", textfont=dict(color="white")
-    ))
-    fig_bench.update_layout(
-        title=T["esg_chart3"],
-        paper_bgcolor="#061a24", plot_bgcolor="#061a24",
-        font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
-        xaxis=dict(gridcolor="rgba(255,255,255,0.07)"),
-        yaxis=dict(gridcolor="rgba(255,255,255,0.07)", title=T["per_emp_yr"])
-    )
-    st.plotly_chart(fig_bench, use_container_width=True)
+    charts.render(charts.employee_benchmark_bar(co_name, per_employee, T["per_emp_yr"], T["esg_chart3"]))
+    rerun_timer.lap("esg_charts")
 
     # Compliance badges
     st.markdown(f"""
@@ -1303,4 +1297,11 @@ st.markdown("""
     <p style='color: #80cfd8; font-size: 13px; margin: 8px 0 4px 0;'>Built for AURELION 2026 Smart Cities Hackathon</p>
     <p style='color: #80cfd850; font-size: 11px; margin: 0;'>Data Sources: EPA Emission Factors | World Bank | IPCC Guidelines | OpenStreetMap | Central Electricity Authority of India</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+if st.query_params.get("timings"):
+    with st.expander("⏱️ Rerun timings", expanded=True):
+        st.markdown("\n".join(f"- **{name}**: {ms:.1f} ms" for name, ms in rerun_timer.breakdown_ms()))
+
+# Prometheus text file for scraping (CARBON_LENS_METRICS_FILE), at most every few seconds
+maybe_write_textfile()
@@ -0,0 +1,141 @@
+# batch_score.py — Re-score large CSV / JSONL survey files on every core, in input order
+# Usage: python batch_score.py surveys.csv scored.csv [--factors cea-2022-23] [--workers 8]
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from factors import registry
+from grid import get_grid
+from history import CATEGORY_COLUMNS
+from lazy_import import lazy_import
+from model import CATEGORIES, calculate_carbon_batch
+from survey_io import input_types, inputs_from_arrow
+
+pa = lazy_import("pyarrow")
+pacsv = lazy_import("pyarrow.csv")
+pajson = lazy_import("pyarrow.json")
+
+RESULT_COLUMNS = ["total"] + CATEGORY_COLUMNS
+
+
+def _read_block(fmt, header, data):
+    if fmt == "csv":
+        options = pacsv.ConvertOptions(column_types=input_types())
+        return pacsv.read_csv(pa.py_buffer(header + data), convert_options=options)
+    # JSON can't parse a number into a string column, so JSONL types are cast afterwards
+    return pajson.read_json(pa.BufferReader(data))
+
+
+def _init_worker():
+    # One process per core already; Arrow's own thread pool would oversubscribe
+    pa.set_cpu_count(1)
+
+
+def score_block(job):
+    """Parse, score and serialize one block of input lines (runs in a worker process).
+
+    Returns (rows, output bytes): the input columns with total and the six
+    category columns appended, in the block's row order.
+    """
+    index, fmt, header, data, factors = job
+    table = _read_block(fmt, header, data)
+    columns = inputs_from_arrow(table)
+    grid_factors = get_grid().lookup(columns["pincode"]) if "pincode" in columns else None
+    total, breakdown = calculate_carbon_batch(columns, factors, grid_factors)
+    for name, values in zip(RESULT_COLUMNS, [total] + [breakdown[c] for c in CATEGORIES]):
+        if name in table.schema.names:
+            table = table.drop_columns([name])
+        table = table.append_column(name, pa.array(values))
+    if fmt == "csv":
+        sink = pa.BufferOutputStream()
+        pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=index == 0))
+        return table.num_rows, sink.getvalue().to_pybytes()
+    lines = [json.dumps(row, ensure_ascii=False) for row in table.to_pylist()]
+    return table.num_rows, ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+def read_blocks(f, block_bytes):
+    """Yield blocks of whole lines of roughly block_bytes each from a binary file"""
+    while True:
+        data = f.read(block_bytes)
+        if not data:
+            return
+        if not data.endswith(b"\n"):
+            data += f.readline()
+        yield data
+
+
+def score_file(input_path, output_path, factors=None, workers=None, block_bytes=8 << 20, progress=None):
+    """Score every row of a CSV or JSONL file (by extension) into output_path.
+
+    Blocks of whole lines are parsed and scored in a process pool; results are
+    written strictly in input order, and at most two blocks per worker are in
+    flight, so memory stays bounded however large the input. progress, if
+    given, is called with the running stats after each block is written.
+    CSV fields must not contain embedded newlines.
+    """
+    fmt = "jsonl" if input_path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    factors = registry.resolve(factors).name
+    workers = workers or os.cpu_count() or 1
+    stats = {"rows": 0, "bytes_in": 0, "blocks": 0, "workers": workers, "seconds": 0.0}
+    start = time.perf_counter()
+    with open(input_path, "rb") as src, open(output_path, "wb") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        header = src.readline() if fmt == "csv" else b""
+        stats["bytes_in"] += len(header)
+        pending = deque()
+
+        def drain(limit):
+            while len(pending) > limit:
+                size, future = pending.popleft()
+                rows, data = future.result()
+                out.write(data)
+                stats["rows"] += rows
+                stats["bytes_in"] += size
+                stats["blocks"] += 1
+                stats["seconds"] = time.perf_counter() - start
+                if progress:
+                    progress(stats)
+
+        for index, data in enumerate(read_blocks(src, block_bytes)):
+            pending.append((len(data), pool.submit(score_block, (index, fmt, header, data, factors))))
+            drain(2 * workers)
+        drain(0)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else 0
+    stats["mb_per_sec"] = round(stats["bytes_in"] / 1e6 / stats["seconds"], 1) if stats["seconds"] else 0
+    return stats
+
+
+def _print_progress(stats):
+    secs = max(stats["seconds"], 1e-9)
+    sys.stderr.write(f"\r{stats['rows']:,} rows  {stats['bytes_in'] / 1e6:,.0f} MB  "
+                     f"{stats['rows'] / secs:,.0f} rows/s  {stats['bytes_in'] / 1e6 / secs:,.1f} MB/s ")
+    sys.stderr.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score a CSV / JSONL file of survey answers with the emission model")
+    parser.add_argument("input", help="CSV or JSONL (.jsonl/.ndjson) with calculate_carbon input columns")
+    parser.add_argument("output", help="File to write scored rows to, same format as the input")
+    parser.add_argument("--factors", choices=registry.names(), help="Emission factor set (default: %(default)s)",
+                        default=registry.default_name)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--block-mb", type=float, default=8, help="Input block size per task in MB")
+    parser.add_argument("--quiet", action="store_true", help="No progress line")
+    args = parser.parse_args()
+
+    stats = score_file(args.input, args.output, args.factors, args.workers, int(args.block_mb * (1 << 20)),
+                       progress=None if args.quiet else _print_progress)
+    if not args.quiet:
+        sys.stderr.write("\n")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# bench_ai_stream.py — Time to first recommendation: blocking vs streaming, against the mock API
+# Usage: python benchmarks/bench_ai_stream.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mock_featherless import start_mock_server
+
+server, base_url = start_mock_server(token_delay=0.02, latency=0.1)
+os.environ["FEATHERLESS_BASE_URL"] = base_url
+os.environ["FEATHERLESS_API_KEY"] = "mock"
+os.environ["CARBON_LENS_AI_CACHE"] = "off"
+
+import ai_recommender
+
+BREAKDOWN = {"🚗 Transport": 1200.0, "⚡ Energy": 800.0, "🍽️ Food": 600.0,
+             "💧 Water": 50.0, "🛍️ Shopping": 300.0, "🗑️ Waste": 20.0}
+TOTAL = sum(BREAKDOWN.values())
+
+
+def main():
+    start = time.perf_counter()
+    lines = ai_recommender.fetch_ai_recommendations(BREAKDOWN, TOTAL)
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    streamed = []
+    for line in ai_recommender.stream_ai_recommendations(BREAKDOWN, TOTAL):
+        if first is None:
+            first = time.perf_counter() - start
+        streamed.append(line)
+    complete = time.perf_counter() - start
+
+    print(f"blocking:  first recommendation after {blocking * 1000:.0f} ms")
+    print(f"streaming: first recommendation after {first * 1000:.0f} ms, all {len(streamed)} after {complete * 1000:.0f} ms")
+    print(f"same lines: {lines == streamed}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
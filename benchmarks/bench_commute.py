@@ -0,0 +1,51 @@
+# bench_commute.py — Offline throughput of the bulk commute matrix
+# Usage: python benchmarks/bench_commute.py [rows] [unique_addresses]
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from commute_matrix import CommuteMatrix, fixture_geocoder, load_geocode_fixture
+from transport_tracker import EMISSION_FACTORS
+
+
+def make_inputs(folder, n, n_addresses, seed=42):
+    """Write a synthetic commute CSV and a matching geocode fixture around Coimbatore"""
+    rng = np.random.default_rng(seed)
+    names = [f"Employee Home {i}, Coimbatore" for i in range(n_addresses)]
+    offices = ["Karunya University", "Coimbatore Railway Station", "Tidel Park Coimbatore"]
+    fixture = pd.DataFrame({
+        "location": names + offices,
+        "lat": 11.0 + rng.normal(0, 0.1, n_addresses + len(offices)),
+        "lon": 76.95 + rng.normal(0, 0.1, n_addresses + len(offices)),
+    })
+    commutes = pd.DataFrame({
+        "employee_id": np.arange(n),
+        "home": rng.choice(names, n),
+        "office": rng.choice(offices, n),
+        "vehicle": rng.choice(list(EMISSION_FACTORS), n),
+        "trips_per_day": rng.integers(1, 5, n),
+    })
+    fixture_path = os.path.join(folder, "geocodes.csv")
+    input_path = os.path.join(folder, "commutes.csv")
+    fixture.to_csv(fixture_path, index=False)
+    commutes.to_csv(input_path, index=False)
+    return input_path, fixture_path
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_addresses = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    with tempfile.TemporaryDirectory() as folder:
+        input_path, fixture_path = make_inputs(folder, n, n_addresses)
+        geocoder = fixture_geocoder(load_geocode_fixture(fixture_path))
+        stats = CommuteMatrix(geocoder).run(input_path, os.path.join(folder, "out.csv"))
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# bench_esg.py — Stream a per-employee CSV through ESGAggregator: throughput and peak memory
+# Usage: python benchmarks/bench_esg.py [employees]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from esg import ESGAggregator
+from bench_model import make_survey
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    survey = pd.DataFrame(make_survey(n))
+    survey["department"] = np.random.default_rng(1).choice(["Operations", "IT", "Sales", "HR", "Finance"], n)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "employees.csv")
+        survey.to_csv(path, index=False)
+        size = os.path.getsize(path)
+        del survey
+
+        start = time.perf_counter()
+        result = ESGAggregator().add_csv(path).result()
+        secs = time.perf_counter() - start
+
+        tracemalloc.start()
+        ESGAggregator().add_csv(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(f"employees:     {n:,} ({size / 1e6:,.0f} MB CSV)")
+    print(f"throughput:    {n / secs:,.0f} rows/s ({secs:.2f} s)")
+    print(f"peak memory:   {peak / 1e6:,.0f} MB (traced)")
+    print(f"company total: {result['company_total']:,} kg CO₂/year")
+    print(f"percentiles:   {result['percentiles']}")
+    print(f"departments:   {len(result['departments'])}")
+
+
+if __name__ == "__main__":
+    main()
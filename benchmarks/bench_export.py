@@ -0,0 +1,45 @@
+# bench_export.py — Export a scored survey to Parquet / Arrow IPC and read it back
+# Usage: python benchmarks/bench_export.py [rows]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from export import export_batch, read_results
+from bench_model import make_survey
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cols = make_survey(n)
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt in ("parquet", "arrow"):
+            path = os.path.join(folder, fmt)
+            start = time.perf_counter()
+            export_batch(cols, path, fmt, employees=100, chunk_rows=250_000)
+            write_secs = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+            allocated = pa.total_allocated_bytes()
+            start = time.perf_counter()
+            table = read_results(path, fmt=fmt)
+            read_secs = time.perf_counter() - start
+            copied = max(pa.total_allocated_bytes() - allocated, 0)
+
+            start = time.perf_counter()
+            scopes = [pc.sum(read_results(path, [s], fmt=fmt).column(s)).as_py() for s in ("scope1", "scope2", "scope3")]
+            scope_secs = time.perf_counter() - start
+
+            print(f"{fmt}: {n:,} rows, {size / 1e6:,.0f} MB on disk")
+            print(f"  export:           {n / write_secs:,.0f} rows/s")
+            print(f"  read all columns: {read_secs * 1000:.0f} ms, {copied / 1e6:,.0f} MB copied into memory")
+            print(f"  scope 1/2/3 sums: {scope_secs * 1000:.0f} ms  {scopes}")
+            del table
+
+
+if __name__ == "__main__":
+    main()
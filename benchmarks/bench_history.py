@@ -0,0 +1,57 @@
+# bench_history.py — History store appends, per-user trends and fleet-wide monthly summaries
+# Usage: python benchmarks/bench_history.py [rows] [users]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from history import CATEGORY_COLUMNS, ParquetHistoryStore, SQLiteHistoryStore
+
+
+def make_records(rows, users, seed=0):
+    """Random footprints spread over the last year"""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    ts = now - rng.uniform(0, 365 * 86400, rows)
+    categories = rng.gamma(2.0, 250.0, (rows, len(CATEGORY_COLUMNS)))
+    user = rng.integers(0, users, rows)
+    return [
+        {"user": f"user{u}", "ts": t, "total": float(c.sum()), **dict(zip(CATEGORY_COLUMNS, c.tolist()))}
+        for u, t, c in zip(user.tolist(), ts.tolist(), categories)
+    ]
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    records = make_records(rows, users)
+    with tempfile.TemporaryDirectory() as folder:
+        for store in (SQLiteHistoryStore(os.path.join(folder, "history.sqlite3")),
+                      ParquetHistoryStore(os.path.join(folder, "history"))):
+            start = time.perf_counter()
+            store.append_many(records)
+            append_secs = time.perf_counter() - start
+            if isinstance(store, ParquetHistoryStore):
+                store.compact()
+            name = type(store).__name__
+            print(f"{name}: {rows:,} rows, {users:,} users")
+            print(f"  append_many():     {rows / append_secs:,.0f} rows/s")
+            print(f"  monthly_trend():   {timed(lambda: store.monthly_trend('user42')) * 1000:.2f} ms")
+            print(f"  category_deltas(): {timed(lambda: store.category_deltas('user42')) * 1000:.2f} ms")
+            print(f"  monthly_summary(): {timed(lambda: store.monthly_summary(), 3) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
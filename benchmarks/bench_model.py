@@ -0,0 +1,51 @@
+# bench_model.py — Scalar calculate_carbon loop vs calculate_carbon_batch
+# Usage: python benchmarks/bench_model.py [rows]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from model import BATCH_COLUMNS, calculate_carbon, calculate_carbon_batch
+
+
+def make_survey(n, seed=42):
+    """Random survey answers within the app's slider ranges"""
+    rng = np.random.default_rng(seed)
+    cols = {name: rng.integers(0, 11, n) for name in BATCH_COLUMNS if name != "car_type"}
+    cols["car_type"] = rng.choice(["Petrol", "Diesel", "None"], n)
+    cols["car_km"] = rng.integers(0, 100, n)
+    cols["electricity_kwh"] = rng.integers(0, 1001, n)
+    cols["water_litres"] = rng.integers(0, 501, n)
+    cols["shower_mins"] = rng.integers(0, 61, n)
+    return cols
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    cols = make_survey(n)
+    # The app passes plain Python numbers, so the scalar loop gets the same
+    rows = list(zip(*[cols[name].tolist() for name in BATCH_COLUMNS]))
+
+    start = time.perf_counter()
+    scalar = [calculate_carbon(*row) for row in rows]
+    scalar_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total, breakdown = calculate_carbon_batch(cols)
+    batch_secs = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for i, (t, b) in enumerate(scalar)
+        if t != total[i] or any(b[k] != breakdown[k][i] for k in b)
+    )
+    print(f"rows:           {n:,}")
+    print(f"scalar loop:    {n / scalar_secs:,.0f} rows/s ({scalar_secs:.3f}s)")
+    print(f"batch engine:   {n / batch_secs:,.0f} rows/s ({batch_secs:.3f}s)")
+    print(f"speedup:        {scalar_secs / batch_secs:.1f}x")
+    print(f"mismatches:     {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_startup.py — Cold-start import cost of app.py, tracked over time
+# Usage: python benchmarks/bench_startup.py [--runs 5] [--history benchmarks/results/startup.jsonl]
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Imports app.py's module graph and runs the script once in Streamlit's bare mode
+# (no server), which is what a fresh worker does before the first paint
+COLD_START = "import runpy; runpy.run_path('app.py', run_name='__main__')"
+
+
+def parse_importtime(stderr):
+    """Top-level modules → cumulative import µs from `python -X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            modules[name.strip()] = modules.get(name.strip(), 0) + int(cumulative)
+    return modules
+
+
+def measure_once():
+    env = dict(os.environ, CARBON_LENS_PRERENDER_VOICE="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COLD_START],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app.py cold-start import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--history", default=os.path.join(ROOT, "benchmarks", "results", "startup.jsonl"))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = [sum(r.values()) / 1000 for r in runs]
+    median_run = sorted(runs, key=lambda r: sum(r.values()))[len(runs) // 2]
+    heaviest = sorted(median_run.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "import_ms_median": round(statistics.median(totals), 1),
+        "import_ms_min": round(min(totals), 1),
+        "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+        "loaded": sorted(m for m in ("pandas", "plotly.express", "requests", "gtts", "geopy") if m in median_run),
+    }
+    print(json.dumps(record, indent=2))
+
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    previous = None
+    if os.path.exists(args.history):
+        with open(args.history, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        previous = json.loads(lines[-1]) if lines else None
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    if previous:
+        delta = record["import_ms_median"] - previous["import_ms_median"]
+        print(f"vs {previous.get('commit')}: {delta:+.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
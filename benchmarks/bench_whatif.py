@@ -0,0 +1,73 @@
+# bench_whatif.py — Incremental what-if scenarios vs recalculating, plus optimizer latency
+# Usage: python benchmarks/bench_whatif.py [scenarios]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from model import BATCH_COLUMNS, calculate_carbon
+from optimizer import optimize
+from whatif import ACTIVITY_NAMES, WhatIf, activities_from_inputs
+from bench_model import make_survey
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    survey = make_survey(1)
+    inputs = {name: survey[name].tolist()[0] for name in BATCH_COLUMNS}
+    baseline = WhatIf(activities_from_inputs(**inputs))
+
+    # Each scenario nudges three random activities, like a slider drag or an intervention
+    rng = np.random.default_rng(7)
+    deltas = [
+        {ACTIVITY_NAMES[i]: float(rng.integers(-5, 6)) for i in rng.choice(28, 3, replace=False)}
+        for _ in range(n)
+    ]
+
+    start = time.perf_counter()
+    for delta in deltas:
+        baseline.evaluate(delta)
+    single_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totals, _ = baseline.evaluate_many(deltas)
+    many_secs = time.perf_counter() - start
+
+    # Full recalculation through calculate_carbon, for scenarios that only touch
+    # direct inputs (flight hours and the petrol/diesel split have no single input)
+    activities = activities_from_inputs(**inputs)
+    comparable = [(d, t) for d, t in zip(deltas, totals.tolist()) if all(k in inputs for k in d)]
+    start = time.perf_counter()
+    worst = 0.0
+    for delta, expected in comparable:
+        changed = dict(inputs)
+        for name, change in delta.items():
+            changed[name] = max(0.0, activities[name] + change)
+        worst = max(worst, abs(calculate_carbon(**changed)[0] - expected))
+    full_secs = time.perf_counter() - start
+
+    # Optimizer latency per user, over a sample of survey respondents
+    users = make_survey(500, seed=3)
+    baselines = [
+        WhatIf(activities_from_inputs(**{name: users[name].tolist()[i] for name in BATCH_COLUMNS}))
+        for i in range(500)
+    ]
+    latencies = []
+    for user in baselines:
+        start = time.perf_counter()
+        optimize(user)
+        latencies.append(time.perf_counter() - start)
+
+    print(f"scenarios:        {n:,}")
+    print(f"evaluate():       {n / single_secs:,.0f} scenarios/s")
+    print(f"evaluate_many():  {n / many_secs:,.0f} scenarios/s")
+    print(f"full recompute:   {len(comparable) / full_secs:,.0f} scenarios/s ({len(comparable):,} comparable)")
+    print(f"max |Δ total|:    {worst:.4f} kg")
+    print(f"optimize() p50:   {np.percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"optimize() p99:   {np.percentile(latencies, 99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
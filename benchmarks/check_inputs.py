@@ -0,0 +1,140 @@
+# check_inputs.py — Regression checks for awkward inputs: sparse survey columns, numeric pincodes, null / non-finite service bodies
+# Usage: python benchmarks/check_inputs.py
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import service
+from batch_score import score_file
+from esg import ESGAggregator
+from gazetteer import load_gazetteer
+
+CHECKS = []
+
+
+def check(fn):
+    CHECKS.append(fn)
+    return fn
+
+
+def _sparse_csv(path, rows=4000, blank_first=False):
+    # bus_km in only one half of the rows, so some blocks see a column that is blank throughout
+    with open(path, "w") as f:
+        f.write("car_type,car_km,bus_km,electricity_kwh,department\n")
+        for i in range(rows):
+            bus = str(i % 7) if (i < rows // 2) != blank_first else ""
+            f.write(f"Petrol,{i % 30},{bus},{100 + i % 50},Ops\n")
+    return rows
+
+
+@check
+def csv_blank_column_block(folder):
+    path, out = os.path.join(folder, "sparse.csv"), os.path.join(folder, "sparse-out.csv")
+    rows = _sparse_csv(path)
+    stats = score_file(path, out, workers=1, block_bytes=4096)
+    assert stats["rows"] == rows and stats["blocks"] > 2, stats
+
+
+@check
+def esg_csv_blank_column_block(folder):
+    path = os.path.join(folder, "sparse.csv")
+    rows = _sparse_csv(path, blank_first=True)
+    result = ESGAggregator().add_csv(path, block_bytes=4096).result()
+    assert result["employees"] == rows, result["employees"]
+
+
+@check
+def jsonl_numeric_pincodes(folder):
+    path, out = os.path.join(folder, "pins.jsonl"), os.path.join(folder, "pins-out.jsonl")
+    with open(path, "w") as f:
+        for i in range(100):
+            f.write(json.dumps({"car_type": "Diesel", "car_km": i, "electricity_kwh": 200, "pincode": 641001}) + "\n")
+    stats = score_file(path, out, workers=1)
+    with open(out) as f:
+        first = json.loads(f.readline())
+    assert stats["rows"] == 100 and first["total"] > 0, (stats, first)
+
+
+@check
+def esg_negative_totals(folder):
+    # Only recycling and composting: a valid row with a net-negative footprint
+    path = os.path.join(folder, "recyclers.csv")
+    with open(path, "w") as f:
+        f.write("recycled_kg,composting_kg,employees\n10,5,3\n0,2,1\n")
+    result = ESGAggregator().add_csv(path).result()
+    assert result["employees"] == 4 and result["company_total"] < 0, result
+
+
+@check
+def esg_fractional_headcount(folder):
+    # 0.3 FTE rows: the headcount and per-employee figure must not depend on the chunking
+    path = os.path.join(folder, "part-time.csv")
+    with open(path, "w") as f:
+        f.write("electricity_kwh,employees\n" + "100,0.3\n" * 4000)
+    whole = ESGAggregator().add_csv(path).result()
+    chunked = ESGAggregator().add_csv(path, block_bytes=4096).result()
+    assert whole["employees"] == chunked["employees"] == 1200, (whole["employees"], chunked["employees"])
+    assert whole["per_employee"] == chunked["per_employee"], (whole["per_employee"], chunked["per_employee"])
+
+
+def _rejected(handler, body):
+    try:
+        handler(body)
+    except service.HTTPError as e:
+        return e.status
+    return None
+
+
+@check
+def service_null_breakdown_category(folder):
+    result = service.recommendations({"breakdown": {"🚗 Transport": None, "⚡ Energy": 5}})
+    assert result["recommendations"], result
+
+
+@check
+def service_null_batch_amounts(folder):
+    scored = service.calculate({"inputs": {"bike_km": 3}})["total"]
+    for body in ({"records": [{"bike_km": None}, {"bike_km": 3}]},
+                 {"columns": {"bike_km": [None, 3]}}):
+        total = service.batch(body)["total"]
+        assert total == [0.0, scored], (body, total)
+
+
+@check
+def service_non_finite(folder):
+    for raw in (b'{"inputs": {"car_km": NaN}}', b'{"inputs": {"car_km": Infinity}}'):
+        assert _rejected(service._parse, raw) == 400, raw
+    overflow = {"car_type": "Petrol", "car_km": 1e308}
+    with np.errstate(all="ignore"):
+        assert _rejected(service.calculate, {"inputs": overflow}) == 400
+        assert _rejected(service.batch, {"records": [overflow]}) == 400
+    assert _rejected(service.recommendations, {"breakdown": {"a": 1e308, "b": 1e308}}) == 400
+
+
+@check
+def gazetteer_partial_names(folder):
+    gazetteer = load_gazetteer()
+    for name in ("Coimbatore South", "Chennai Port", "Railway Station", "International Airport"):
+        assert gazetteer.resolve(name) is None, name
+    assert gazetteer.resolve("Coimbatre") == gazetteer.resolve("Coimbatore")
+
+
+def main():
+    failed = 0
+    with tempfile.TemporaryDirectory() as folder:
+        for fn in CHECKS:
+            try:
+                fn(folder)
+                print(f"ok    {fn.__name__}")
+            except Exception as e:
+                failed += 1
+                print(f"FAIL  {fn.__name__}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# load_service.py — Load-test service.py over keep-alive connections: requests/s and latency percentiles
+# Usage: python benchmarks/load_service.py [--connections 32] [--seconds 10] [--batch 1000]
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+from model import BATCH_COLUMNS
+from bench_model import make_survey
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(path, body):
+    data = json.dumps(body).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n").encode() + data
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = int(head.lower().split(b"content-length:", 1)[1].split(b"\r\n", 1)[0])
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(port, payload, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 24)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(payload)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(port, name, payload, connections, seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(port, payload, deadline, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    print(f"{name:<22} {len(ms) / elapsed:>9,.0f} req/s   p50 {np.percentile(ms, 50):6.2f} ms   "
+          f"p99 {np.percentile(ms, 99):6.2f} ms   errors {len(errors)}")
+
+
+async def wait_ready(port, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def main(args):
+    survey = make_survey(args.batch, seed=5)
+    one = {name: survey[name].tolist()[0] for name in BATCH_COLUMNS}
+    columns = {name: survey[name].tolist() for name in BATCH_COLUMNS}
+    records = [dict(zip(BATCH_COLUMNS, row)) for row in zip(*columns.values())]
+    scenarios = [
+        ("/calculate", request("/calculate", {"inputs": one})),
+        ("/recommendations", request("/recommendations", {"inputs": one})),
+        (f"/batch columns x{args.batch}", request("/batch", {"columns": columns})),
+        (f"/batch records x{args.batch}", request("/batch", {"records": records})),
+    ]
+
+    port = free_port()
+    # One service process = one core; the client runs in this process
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "service.py"), "--port", str(port)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        await wait_ready(port)
+        print(f"{args.connections} keep-alive connections, {args.seconds:g} s per endpoint")
+        for name, payload in scenarios:
+            await run(port, name, payload, args.connections, args.seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Carbon Lens scoring service")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch", type=int, default=1000, help="records per /batch request")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+# mock_featherless.py — Local stand-in for the Featherless chat-completions API
+# Usage: python benchmarks/mock_featherless.py [--port 8765] [--token-delay 0.02]
+# then run the app with FEATHERLESS_BASE_URL=http://127.0.0.1:8765/v1
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RECOMMENDATIONS = [
+    "🚌 Take the bus or metro three days a week — saves about 500 kg CO₂/year",
+    "☀️ Install 2 kW rooftop solar under PM Surya Ghar — saves about 1,900 kg CO₂/year",
+    "🥗 Swap four chicken meals a week for dal and sabzi — saves about 230 kg CO₂/year",
+    "❄️ Run the AC at 24°C with a BEE 5-star inverter unit — saves about 200 kg CO₂/year",
+    "♻️ Compost kitchen waste with a balcony khamba — saves about 60 kg CO₂/year",
+]
+COMPLETION = "\n".join(RECOMMENDATIONS)
+
+
+class MockFeatherlessHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.02   # seconds between streamed tokens
+    latency = 0.0        # seconds before the first byte
+    fail = False         # answer every request with 503
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+        if self.fail:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if body.get("stream"):
+            self._stream()
+        else:
+            time.sleep(self.token_delay * len(COMPLETION.split(" ")))
+            payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": COMPLETION}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = COMPLETION.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == len(words) - 1 else word + " "
+            self._chunk({"choices": [{"delta": {"content": token}}]})
+            time.sleep(self.token_delay)
+        self._chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, event):
+        data = event if isinstance(event, str) else json.dumps(event)
+        line = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients hanging up on keep-alive connections is expected
+
+
+def start_mock_server(port=0, **settings):
+    """Serve the mock in a daemon thread; returns (server, base_url)"""
+    handler = type("Handler", (MockFeatherlessHandler,), settings)
+    server = QuietServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Featherless chat-completions API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_mock_server(args.port, token_delay=args.token_delay, latency=args.latency)
+    print(f"Mock Featherless API at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# mock_services.py — Local stand-ins for Nominatim geocoding and Google TTS, for offline benchmarks
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+from mock_featherless import QuietServer
+
+# A few KB of bytes standing in for an MP3 clip
+FAKE_MP3 = b"ID3\x03\x00\x00\x00" + bytes(range(256)) * 16
+
+
+class MockNominatimHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        time.sleep(self.latency)
+        # Deterministic point inside India for any query
+        digest = hashlib.sha256(query.lower().encode()).digest()
+        lat = 8.0 + digest[0] / 255 * 25.0
+        lon = 68.0 + digest[1] / 255 * 29.0
+        self._send([{"lat": f"{lat:.6f}", "lon": f"{lon:.6f}", "display_name": query, "place_id": 1}])
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockTTSHandler(BaseHTTPRequestHandler):
+    """Answers gTTS's batchexecute RPC with FAKE_MP3 in the same line format"""
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        audio = base64.b64encode(FAKE_MP3).decode()
+        body = f')]}}\'\n\n[["wrb.fr","jQ1olc","[\\"{audio}\\"]",null,null,null,"generic"]]\n'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _start(handler, settings):
+    server = QuietServer(("127.0.0.1", 0), type("Handler", (handler,), settings))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
+
+
+def start_mock_nominatim(**settings):
+    """Serve the mock geocoder in a daemon thread; returns (server, host:port)"""
+    return _start(MockNominatimHandler, settings)
+
+
+def start_mock_tts(**settings):
+    """Serve the mock TTS endpoint in a daemon thread; returns (server, host:port)"""
+    return _start(MockTTSHandler, settings)
+
+
+def use_mock_geocoder(domain):
+    """Point transport_tracker's Nominatim client at a mock server"""
+    from geopy.geocoders import Nominatim
+
+    import transport_tracker
+    transport_tracker._geolocator = Nominatim(user_agent="carbon_lens_bench", domain=domain, scheme="http")
+
+
+def use_mock_tts(domain):
+    """Send gTTS requests to a mock server instead of translate.google.*"""
+    import gtts.tts
+    gtts.tts._translate_url = lambda tld="com", path="": f"http://{domain}/{path}"
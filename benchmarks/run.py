@@ -0,0 +1,289 @@
+# run.py — Offline benchmark suite over every hot path, saved as JSON and compared with a baseline
+# Usage: python benchmarks/run.py [--only model,app] [--quick] [--save-baseline] [--fail-on-regression]
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RESULTS_DIR = os.path.join(HERE, "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+# Everything the app would fetch goes to local mocks, and every cache starts
+# empty in a throwaway folder; this must happen before the app modules import
+_scratch = tempfile.mkdtemp(prefix="carbon-lens-bench-")
+os.environ.update({
+    "CARBON_LENS_CACHE_DIR": _scratch,
+    "CARBON_LENS_PRERENDER_VOICE": "0",
+    "FEATHERLESS_API_KEY": "mock",
+})
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+from mock_featherless import start_mock_server
+from mock_services import start_mock_nominatim, start_mock_tts, use_mock_geocoder, use_mock_tts
+
+_, _featherless_url = start_mock_server(token_delay=0.001)
+os.environ["FEATHERLESS_BASE_URL"] = _featherless_url
+_, _nominatim = start_mock_nominatim()
+_, _tts = start_mock_tts()
+use_mock_geocoder(_nominatim)
+use_mock_tts(_tts)
+
+import numpy as np
+from streamlit.logger import set_log_level
+
+set_log_level("error")  # cache_data outside a Streamlit runtime warns on every call
+
+import ai_recommender
+import charts
+import transport_tracker
+import voice
+from bench_history import make_records
+from bench_model import make_survey
+from bench_startup import measure_once as measure_startup
+from history import SQLiteHistoryStore
+from model import (BATCH_COLUMNS, ActivityColumns, ActivityRecord, calculate_carbon, calculate_carbon_batch,
+                   calculate_record, get_recommendations)
+from optimizer import optimize
+from uncertainty import uncertainty_bands
+from whatif import WhatIf, activities_from_inputs
+
+CASES = {}
+
+
+def case(name):
+    """Register a benchmark; it gets a Bench and records metrics on it"""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+class Bench:
+    """Collects one case's metrics; every metric is lower-is-better"""
+
+    def __init__(self, quick=False):
+        self.quick = quick
+        self.metrics = {}
+
+    def time(self, name, fn, repeat=5, unit="us"):
+        """Best per-call latency over `repeat` rounds, plus the peak traced
+        allocation of a single call. Each round calls fn enough times to last
+        at least 50 ms (10 ms with --quick), so timer noise stays small."""
+        scale = {"us": 1e6, "ms": 1e3}[unit]
+        min_round = 0.01 if self.quick else 0.05
+        if self.quick:
+            repeat = min(repeat, 3)
+        start = time.perf_counter()
+        fn()  # warm-up, and a first estimate of the per-call cost
+        number = max(1, int(min_round / max(time.perf_counter() - start, 1e-7)))
+        rounds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            rounds.append((time.perf_counter() - start) / number)
+        self.metrics[f"{name}_{unit}"] = round(min(rounds) * scale, 3)
+        self.memory(name, fn)
+
+    def memory(self, name, fn):
+        tracemalloc.start()
+        try:
+            fn()
+            self.metrics[f"{name}_peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+
+    def record(self, name, value):
+        self.metrics[name] = round(value, 3)
+
+
+BREAKDOWN = {"🚗 Transport": 1200.0, "⚡ Energy": 800.0, "🍽️ Food": 600.0,
+             "💧 Water": 50.0, "🛍️ Shopping": 300.0, "🗑️ Waste": 20.0}
+TOTAL = sum(BREAKDOWN.values())
+SURVEY = make_survey(100_000)
+ONE = {name: SURVEY[name].tolist()[0] for name in BATCH_COLUMNS}
+
+
+@case("model")
+def bench_model(b):
+    args = [ONE[name] for name in BATCH_COLUMNS]
+    record = ActivityRecord(*args)
+    columns = ActivityColumns.from_columns(SURVEY)
+    b.time("calculate_carbon", lambda: calculate_carbon(*args))
+    b.time("calculate_record", lambda: calculate_record(record))
+    b.time("calculate_carbon_batch_100k", lambda: calculate_carbon_batch(SURVEY), repeat=5, unit="ms")
+    b.time("activity_columns_batch_100k", lambda: calculate_carbon_batch(columns), repeat=5, unit="ms")
+    b.time("get_recommendations", lambda: get_recommendations(BREAKDOWN, TOTAL))
+
+
+@case("whatif")
+def bench_whatif(b):
+    whatif = WhatIf(activities_from_inputs(**ONE))
+    b.time("whatif_build", lambda: WhatIf(activities_from_inputs(**ONE)))
+    b.time("evaluate", lambda: whatif.evaluate({"electricity_kwh": -50, "bus_km": 5}))
+    b.time("optimize", lambda: optimize(whatif), unit="ms")
+    b.time("uncertainty_bands", lambda: uncertainty_bands(whatif), unit="ms")
+
+
+@case("transport")
+def bench_transport(b):
+    # Gazetteer hits stay in-process; anything else goes to the mock Nominatim once, then the cache
+    b.time("distance_gazetteer", lambda: transport_tracker.calculate_distance("Coimbatore", "Chennai"))
+    b.time("distance_cached", lambda: transport_tracker.calculate_distance("Bench Nagar One", "Bench Nagar Two"))
+    b.time("transport_emission", lambda: transport_tracker.calculate_transport_emission(12.5, "Public Bus", 2))
+
+
+@case("ai")
+def bench_ai(b):
+    b.time("fetch_uncached", lambda: ai_recommender.fetch_ai_recommendations(BREAKDOWN, TOTAL), unit="ms")
+    b.time("get_cached", lambda: ai_recommender.get_ai_recommendations(BREAKDOWN, TOTAL))
+
+    def first_line():
+        return next(iter(ai_recommender.stream_ai_recommendations({**BREAKDOWN, "🗑️ Waste": time.time()}, TOTAL)))
+    b.time("stream_first_line", first_line, unit="ms")
+
+
+@case("voice")
+def bench_voice(b):
+    text = voice.summary_text(TOTAL, BREAKDOWN)
+    b.time("synthesize_uncached", lambda: voice.synthesize(text, "en"), unit="ms")
+    b.time("generate_cached", lambda: voice.generate_voice_summary(TOTAL, BREAKDOWN))
+
+
+@case("charts")
+def bench_charts(b):
+    items = tuple(BREAKDOWN.items())
+    # Builders unwrapped from st.cache_data, i.e. what a cache miss costs
+    b.time("breakdown_pie", lambda: charts.breakdown_pie._info.func(items), unit="ms")
+    b.time("breakdown_bar", lambda: charts.breakdown_bar._info.func(items), unit="ms")
+    b.time("benchmark_bar", lambda: charts.benchmark_bar._info.func(TOTAL, (2500.0, 3400.0)), unit="ms")
+    b.time("scope_pie", lambda: charts.scope_pie._info.func(1.0e5, 8.0e4, 9.7e4, "Scopes"), unit="ms")
+    fig_json = charts.breakdown_pie._info.func(items)
+    b.time("figure_from_json", lambda: charts._figure._info.func(fig_json), unit="ms")
+
+
+@case("history")
+def bench_history(b):
+    store = SQLiteHistoryStore(os.path.join(_scratch, "bench-history.sqlite3"))
+    store.append_many(make_records(20_000 if b.quick else 100_000, 2_000))
+    b.time("monthly_trend", lambda: store.monthly_trend("user42"))
+    b.time("monthly_summary", lambda: store.monthly_summary(), unit="ms")
+
+
+@case("app")
+def bench_app(b):
+    from streamlit.testing.v1 import AppTest
+
+    def fresh():
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        at.run()
+        return at
+
+    at = fresh()
+    set_log_level("error")  # AppTest resets Streamlit's loggers when it starts
+    calculate = next(button for button in at.button if "CALCULATE" in button.label)
+    start = time.perf_counter()
+    calculate.click().run()
+    b.record("calculate_rerun_ms", (time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    b.time("plain_rerun", at.run, repeat=3 if b.quick else 5, unit="ms")
+    b.time("first_run", fresh, repeat=3, unit="ms")
+
+
+@case("startup")
+def bench_startup(b):
+    runs = [sum(measure_startup().values()) / 1000 for _ in range(2 if b.quick else 5)]
+    b.record("import_ms", statistics.median(runs))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Rows of (case, metric, baseline, current, ratio, regressed) for shared metrics"""
+    rows = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get("results", {}).get(name, {}).get(metric)
+            if before:
+                ratio = value / before
+                rows.append((name, metric, before, value, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Carbon Lens benchmark suite offline")
+    parser.add_argument("--only", help=f"Comma-separated cases (default: all of {', '.join(CASES)})")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    parser.add_argument("--output", help="Where to write results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Also write these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Flag metrics this much worse (0.2 = +20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(CASES)
+    unknown = [name for name in selected if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        bench = Bench(args.quick)
+        start = time.perf_counter()
+        CASES[name](bench)
+        results[name] = bench.metrics
+        print(f"{name:<10} {time.perf_counter() - start:6.1f} s  " +
+              "  ".join(f"{metric}={value:g}" for metric, value in bench.metrics.items()), flush=True)
+
+    commit = git_commit()
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'results'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+    print(f"\nwrote {output}")
+
+    regressed = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nvs baseline {baseline.get('commit')} ({baseline.get('timestamp')}):")
+        for name, metric, before, value, ratio, bad in rows:
+            flag = "  << REGRESSION" if bad else ""
+            print(f"  {name + '.' + metric:<44} {before:>12g} → {value:<12g} {ratio - 1:+7.1%}{flag}")
+        regressed = [row for row in rows if row[5]]
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        print(f"saved baseline {args.baseline}")
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
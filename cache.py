@@ -0,0 +1,286 @@
+# cache.py — In-process LRU+TTL cache with an optional SQLite disk tier
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+MISSING = object()
+
+# Where the SQLite disk tiers live unless a caller picks its own path
+CACHE_DIR = os.environ.get(
+    "CARBON_LENS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Bounded by entry count, and optionally by total weight, e.g.
+    TTLCache(weigher=len, max_weight=32 * 2**20) for 32 MB of bytes values.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, weigher=None, max_weight=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigher = weigher
+        self.max_weight = max_weight
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._pop(key)
+            self.misses += 1
+            return default
+
+    def _pop(self, key):
+        value, _ = self._data.pop(key)
+        if self.weigher:
+            self.weight -= self.weigher(value)
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, expires)
+            if self.weigher:
+                self.weight += self.weigher(value)
+            while len(self._data) > self.maxsize or (
+                self.max_weight is not None and self.weight > self.max_weight and len(self._data) > 1
+            ):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class DiskCache:
+    """SQLite key/value store with per-entry expiry, shared by all threads"""
+
+    def __init__(self, path, table="cache", ttl=None, dumps=json.dumps, loads=json.loads):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self._dumps = dumps
+        self._loads = loads
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return default
+        return self._loads(value)
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, self._dumps(value), expires),
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TieredCache:
+    """TTLCache in front of an optional DiskCache; disk hits are promoted to memory"""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not MISSING:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        return {
+            "memory_size": len(self.memory),
+            "disk_size": len(self.disk) if self.disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+class _Broadcast:
+    """Items a leader's generator has yielded so far, replayed to followers as they arrive"""
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self.items.append(item)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            if not self.done:
+                self.done, self.error = True, error
+                self._cond.notify_all()
+
+    def replay(self):
+        sent = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self.items) > sent)
+                fresh, done, error = self.items[sent:], self.done, self.error
+            sent += len(fresh)
+            yield from fresh
+            if done and sent == len(self.items):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is in
+    flight block and receive the same result (or exception). stream() does
+    the same for generator functions, handing followers each item as the
+    leader yields it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stream(self, key, fn, *args, **kwargs):
+        """Generator: fn(*args, **kwargs)'s items, run once for concurrent callers with the same key"""
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._streams[key] = _Broadcast()
+            else:
+                self.coalesced += 1
+        if not leader:
+            yield from flight.replay()
+            return
+        try:
+            for item in fn(*args, **kwargs):
+                flight.put(item)
+                yield item
+        except Exception as e:
+            flight.finish(e)
+            raise
+        else:
+            flight.finish()
+        finally:
+            with self._lock:
+                del self._streams[key]
+            # No-op unless the leader's consumer stopped early; followers must not wait forever
+            flight.finish(RuntimeError(f"stream for {key!r} was abandoned"))
+
+
+def open_disk_cache(path, table, ttl=None, **kwargs):
+    """DiskCache, or None when the path isn't writable (e.g. a read-only container)"""
+    try:
+        return DiskCache(path, table=table, ttl=ttl, **kwargs)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,188 @@
+# charts.py — Plotly figures for the results page, memoized as JSON across reruns
+import json
+
+import streamlit as st
+
+from lazy_import import lazy_import
+from metrics import span, timed
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+pd = lazy_import("pandas")
+
+# Streamlit reruns app.py on every widget change; figures only change when their
+# inputs do, so each builder is cached on its (hashable) inputs and returns the
+# serialized figure. Pass the result to render(). Only cache misses reach the
+# chart_build span.
+_cache_data = st.cache_data(max_entries=256, show_spinner=False)
+
+
+def _cache(builder):
+    return _cache_data(timed("chart_build")(builder))
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def _figure(fig_json):
+    # Validating a dict into a Figure is most of plotly_chart's cost; do it once
+    # per distinct figure and share the (never mutated) result across sessions
+    return go.Figure(json.loads(fig_json))
+
+
+def render(fig_json):
+    """Show a cached figure JSON string with st.plotly_chart"""
+    with span("chart_render"):
+        st.plotly_chart(_figure(fig_json), use_container_width=True)
+
+
+@_cache
+def breakdown_pie(breakdown_items):
+    df = pd.DataFrame({
+        "Category": [k for k, _ in breakdown_items],
+        "CO₂ (kg/year)": [v for _, v in breakdown_items]
+    })
+    fig = px.pie(df, values="CO₂ (kg/year)", names="Category",
+                 title="📊 Emission Sources Breakdown",
+                 color_discrete_sequence=["#00ff88", "#00e5ff", "#ffaa00", "#ff6b6b", "#a855f7", "#f97316"])
+    fig.update_traces(textposition='inside', textinfo='percent+label',
+                      textfont=dict(color='white', size=12))
+    fig.update_layout(
+        paper_bgcolor='#061a24',
+        plot_bgcolor='#061a24',
+        font=dict(color='#80cfd8'),
+        title_font=dict(color='#00e5ff', size=14),
+        legend=dict(font=dict(color='#80cfd8'))
+    )
+    return fig.to_json()
+
+
+@_cache
+def breakdown_bar(breakdown_items):
+    df = pd.DataFrame({
+        "Category": [k for k, _ in breakdown_items],
+        "CO₂ (kg/year)": [v for _, v in breakdown_items]
+    })
+    fig = px.bar(df, x="Category", y="CO₂ (kg/year)",
+                 title="📈 Emissions by Category",
+                 color="CO₂ (kg/year)",
+                 color_continuous_scale=[[0, "#00ff88"], [0.5, "#ffaa00"], [1, "#ff4444"]])
+    fig.update_layout(
+        paper_bgcolor='#061a24',
+        plot_bgcolor='#061a24',
+        font=dict(color='#80cfd8'),
+        title_font=dict(color='#00e5ff', size=14),
+        xaxis=dict(gridcolor='rgba(255,255,255,0.07)', tickangle=-30),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.07)')
+    )
+    return fig.to_json()
+
+
+@_cache
+def benchmark_bar(total, band=None):
+    """band: optional (low, high) range for the user's bar, drawn as an error bar"""
+    compare_df = pd.DataFrame({
+        "": ["🧑 You", "🇮🇳 India Avg", "🌍 Global Avg", "🎯 Paris Target"],
+        "CO₂ (kg/year)": [total, 1800, 4000, 2300],
+        "Color": ["#00e5ff", "#00ff88", "#ff4444", "#ffaa00"]
+    })
+    fig = go.Figure(go.Bar(
+        x=compare_df[""],
+        y=compare_df["CO₂ (kg/year)"],
+        marker_color=compare_df["Color"],
+        text=compare_df["CO₂ (kg/year)"].apply(lambda x: f"{x:,.0f} kg"),
+        textposition='outside',
+        textfont=dict(color='white'),
+        error_y=None if band is None else dict(
+            type='data', symmetric=False, color='#80cfd8', thickness=1.5, width=8,
+            array=[max(band[1] - total, 0), 0, 0, 0],
+            arrayminus=[max(total - band[0], 0), 0, 0, 0],
+        )
+    ))
+    fig.update_layout(
+        title="🌍 Your Footprint vs World Benchmarks",
+        paper_bgcolor='#061a24',
+        plot_bgcolor='#061a24',
+        font=dict(color='#80cfd8'),
+        title_font=dict(color='#00e5ff', size=14),
+        xaxis=dict(gridcolor='rgba(255,255,255,0.07)'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.07)', title="kg CO₂/year")
+    )
+    return fig.to_json()
+
+
+@_cache
+def scope_pie(scope1, scope2, scope3, title):
+    scope_df = pd.DataFrame({
+        "Scope": ["Scope 1 — Direct", "Scope 2 — Electricity", "Scope 3 — Value Chain"],
+        "kg CO₂": [scope1, scope2, scope3]
+    })
+    fig = px.pie(scope_df, values="kg CO₂", names="Scope",
+        title=title,
+        color_discrete_sequence=["#ff4444", "#ffaa00", "#00e5ff"])
+    fig.update_traces(textposition="inside", textinfo="percent+label", textfont=dict(color="white", size=12))
+    fig.update_layout(paper_bgcolor="#061a24", plot_bgcolor="#061a24",
+        font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
+        legend=dict(font=dict(color="#80cfd8")))
+    return fig.to_json()
+
+
+@_cache
+def company_category_pie(company_items, title):
+    cat_df = pd.DataFrame({
+        "Category": [k for k, _ in company_items],
+        "kg CO₂": [v for _, v in company_items]
+    })
+    fig = px.pie(cat_df, values="kg CO₂", names="Category",
+        title=title,
+        color_discrete_sequence=["#00ff88","#00e5ff","#ffaa00","#ff6b6b","#a855f7","#f97316"])
+    fig.update_traces(textposition="inside", textinfo="percent+label", textfont=dict(color="white", size=12))
+    fig.update_layout(paper_bgcolor="#061a24", plot_bgcolor="#061a24",
+        font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
+        legend=dict(font=dict(color="#80cfd8")))
+    return fig.to_json()
+
+
+@_cache
+def employee_benchmark_bar(co_name, per_employee, axis_label, title):
+    bench_df = pd.DataFrame({
+        "": [f"🏢 {co_name[:15]}", "🇮🇳 India Avg", "🌍 Global Avg", "🎯 Paris Target"],
+        axis_label: [per_employee, 1800, 4000, 2300],
+        "Color": ["#00e5ff", "#00ff88", "#ff4444", "#ffaa00"]
+    })
+    fig = go.Figure(go.Bar(
+        x=bench_df[""],
+        y=bench_df[axis_label],
+        marker_color=bench_df["Color"],
+        text=bench_df[axis_label].apply(lambda x: f"{x:,} kg"),
+        textposition="outside", textfont=dict(color="white")
+    ))
+    fig.update_layout(
+        title=title,
+        paper_bgcolor="#061a24", plot_bgcolor="#061a24",
+        font=dict(color="#80cfd8"), title_font=dict(color="#00e5ff", size=14),
+        xaxis=dict(gridcolor="rgba(255,255,255,0.07)"),
+        yaxis=dict(gridcolor="rgba(255,255,255,0.07)", title=axis_label)
+    )
+    return fig.to_json()
+
+
+@_cache
+def monthly_trend(points):
+    """points: ((month, total kg/year), ...) oldest first, from HistoryStore.monthly_trend"""
+    months = [month for month, _ in points]
+    fig = go.Figure(go.Scatter(
+        x=months, y=[total for _, total in points],
+        mode='lines+markers', line=dict(color='#00e5ff', width=3),
+        marker=dict(size=8, color='#00ff88'), name="You"
+    ))
+    fig.add_hline(y=2300, line_dash='dash', line_color='#ffaa00',
+                  annotation_text="🎯 Paris Target", annotation_font_color='#ffaa00')
+    fig.update_layout(
+        title="📈 Your Footprint Over Time",
+        paper_bgcolor='#061a24',
+        plot_bgcolor='#061a24',
+        font=dict(color='#80cfd8'),
+        title_font=dict(color='#00e5ff', size=14),
+        xaxis=dict(gridcolor='rgba(255,255,255,0.07)', type='category'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.07)', title="kg CO₂/year")
+    )
+    return fig.to_json()
@@ -0,0 +1,154 @@
+# esg.py — GHG Protocol scope split and ESG score for a company-wide estimate
+import numpy as np
+
+from grid import get_grid
+from lazy_import import lazy_import
+from model import CATEGORIES, calculate_carbon_batch
+from survey_io import input_types, inputs_from_arrow
+
+pacsv = lazy_import("pyarrow.csv")
+
+# Scope 1 = direct (transport & fuel), Scope 2 = purchased electricity,
+# Scope 3 = value chain (everything else)
+SCOPE_CATEGORIES = {
+    "scope1": ["🚗 Transport"],
+    "scope2": ["⚡ Energy"],
+    "scope3": ["🍽️ Food", "💧 Water", "🛍️ Shopping", "🗑️ Waste"],
+}
+assert sorted(sum(SCOPE_CATEGORIES.values(), [])) == sorted(CATEGORIES)
+
+KG_PER_TREE = 22  # kg CO₂ a mature tree absorbs per year
+ESG_COLUMNS = ["employees", "company_total", "scope1", "scope2", "scope3", "per_employee", "trees", "esg_score"]
+
+
+def esg_metrics(total, breakdown, employees):
+    """Company-wide figures from one employee's footprint, as shown in the ESG report"""
+    company_total = round(total * employees)
+    metrics = {"employees": employees, "company_total": company_total}
+    for scope, categories in SCOPE_CATEGORIES.items():
+        metrics[scope] = round(sum(breakdown.get(c, 0) for c in categories) * employees)
+    metrics["per_employee"] = round(total)
+    metrics["trees"] = int(company_total / KG_PER_TREE)
+    metrics["esg_score"] = max(0, min(100, round(100 - (total / 60))))
+    return metrics
+
+
+def esg_columns(total, breakdown, employees):
+    """esg_metrics over arrays: total and breakdown values are per-row arrays,
+    employees a scalar or per-row array. Returns {column: int64 array}."""
+    total = np.asarray(total, dtype=np.float64)
+    employees = np.broadcast_to(np.asarray(employees, dtype=np.int64), total.shape)
+    company_total = np.rint(total * employees)
+    columns = {"employees": employees, "company_total": company_total}
+    for scope, categories in SCOPE_CATEGORIES.items():
+        summed = np.zeros_like(total)
+        for c in categories:
+            summed = summed + breakdown[c]
+        columns[scope] = np.rint(summed * employees)
+    columns["per_employee"] = np.rint(total)
+    columns["trees"] = np.trunc(company_total / KG_PER_TREE)
+    columns["esg_score"] = np.clip(np.rint(100 - total / 60), 0, 100)
+    return {name: columns[name].astype(np.int64) for name in ESG_COLUMNS}
+
+
+# Per-employee totals are binned into a fixed histogram for streaming percentiles;
+# anything above the last edge lands in the last bin, and net-negative totals
+# (e.g. only recycling and composting) in the first
+PERCENTILE_BIN_KG = 1.0
+PERCENTILE_MAX_KG = 200_000
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+AGGREGATE_COLUMNS = ["total"] + list(SCOPE_CATEGORIES) + CATEGORIES
+
+
+class ESGAggregator:
+    """Company footprint from per-employee (or per-department) input rows.
+
+    Feed chunks of calculate_carbon_batch columns with add(); each chunk is
+    scored and folded into running sums, per-department sums and a fixed-size
+    histogram of per-employee totals, then dropped. Memory is bounded by the
+    chunk size, not the headcount. Optional columns: "department", "employees"
+    (how many people a row stands for; default 1) and "pincode" (grid factor).
+    """
+
+    def __init__(self, factors=None, percentiles=DEFAULT_PERCENTILES):
+        self.factors = factors
+        self.percentiles = percentiles
+        self.employees = 0.0  # fractional rows (e.g. 0.5 FTE) add up exactly; rounded in result()
+        self.rows = 0
+        self.sums = np.zeros(len(AGGREGATE_COLUMNS))
+        self.departments = {}  # name → [employees, sums array]
+        self._histogram = np.zeros(int(PERCENTILE_MAX_KG / PERCENTILE_BIN_KG) + 1)
+
+    def add(self, columns):
+        """Score one chunk (a DataFrame or dict of arrays) and fold it in"""
+        n = len(columns["car_type"])
+        if n == 0:
+            return self
+        weights = np.asarray(columns["employees"], dtype=np.float64) if "employees" in columns else np.ones(n)
+        grid_factors = get_grid().lookup(np.asarray(columns["pincode"])) if "pincode" in columns else None
+        total, breakdown = calculate_carbon_batch(columns, self.factors, grid_factors)
+        values = np.empty((n, len(AGGREGATE_COLUMNS)))
+        values[:, 0] = total
+        for i, (scope, categories) in enumerate(SCOPE_CATEGORIES.items(), start=1):
+            values[:, i] = sum(breakdown[c] for c in categories)
+        for i, category in enumerate(CATEGORIES, start=1 + len(SCOPE_CATEGORIES)):
+            values[:, i] = breakdown[category]
+        weighted = values * weights[:, None]
+
+        self.rows += n
+        self.employees += float(weights.sum())
+        self.sums += weighted.sum(axis=0)
+        bins = np.clip((total / PERCENTILE_BIN_KG).astype(np.int64), 0, len(self._histogram) - 1)
+        self._histogram += np.bincount(bins, weights=weights, minlength=len(self._histogram))
+
+        if "department" in columns:
+            names, idx = np.unique(np.asarray(columns["department"]).astype(str), return_inverse=True)
+            counts = np.bincount(idx, weights=weights, minlength=len(names))
+            sums = np.column_stack([np.bincount(idx, weights=weighted[:, j], minlength=len(names))
+                                    for j in range(len(AGGREGATE_COLUMNS))])
+            for name, count, row in zip(names.tolist(), counts.tolist(), sums):
+                entry = self.departments.setdefault(name, [0.0, np.zeros(len(AGGREGATE_COLUMNS))])
+                entry[0] += count
+                entry[1] += row
+        return self
+
+    def add_csv(self, source, block_bytes=4 << 20):
+        """Stream a CSV (path or file object) through add() one block at a time.
+
+        Missing input columns and empty cells default to 0 (car_type to "None")."""
+        reader = pacsv.open_csv(source, read_options=pacsv.ReadOptions(block_size=block_bytes),
+                                convert_options=pacsv.ConvertOptions(column_types=input_types()))
+        for batch in reader:
+            columns = inputs_from_arrow(batch)
+            self.add(columns)
+        return self
+
+    def percentile_values(self):
+        """{p: per-employee kg CO₂/year}, to within PERCENTILE_BIN_KG"""
+        cumulative = np.cumsum(self._histogram)
+        if cumulative[-1] == 0:
+            return {p: 0.0 for p in self.percentiles}
+        ranks = np.asarray(self.percentiles, dtype=np.float64) / 100 * cumulative[-1]
+        bins = np.searchsorted(cumulative, ranks, side="left")
+        return dict(zip(self.percentiles, ((bins + 0.5) * PERCENTILE_BIN_KG).tolist()))
+
+    def result(self):
+        """Company figures in esg_metrics' shape, plus "percentiles" and "departments"."""
+        out = _rollup(self.employees, self.sums)
+        out["rows"] = self.rows
+        out["percentiles"] = self.percentile_values()
+        out["departments"] = {name: _rollup(count, sums) for name, (count, sums) in sorted(self.departments.items())}
+        return out
+
+
+def _rollup(employees, sums):
+    totals = dict(zip(AGGREGATE_COLUMNS, sums.tolist()))
+    mean = totals["total"] / employees if employees else 0.0
+    company_total = round(totals["total"])
+    out = {"employees": int(round(employees)), "company_total": company_total}
+    out.update({scope: round(totals[scope]) for scope in SCOPE_CATEGORIES})
+    out["per_employee"] = round(mean)
+    out["trees"] = int(company_total / KG_PER_TREE)
+    out["esg_score"] = max(0, min(100, round(100 - (mean / 60))))
+    out["categories"] = {c: round(totals[c]) for c in CATEGORIES}
+    return out
@@ -0,0 +1,121 @@
+# export.py — Columnar export of calculation results (inputs, breakdown, ESG) to Parquet / Arrow IPC
+import os
+import time
+import uuid
+
+import numpy as np
+
+from esg import ESG_COLUMNS, esg_columns
+from history import CATEGORY_COLUMNS, month_codes, month_label
+from lazy_import import lazy_import
+from model import BATCH_COLUMNS, CATEGORIES, calculate_carbon_batch
+
+pa = lazy_import("pyarrow")
+ds = lazy_import("pyarrow.dataset")
+pafs = lazy_import("pyarrow.fs")
+
+# Folder the app appends every calculation to; unset/empty disables the export
+RESULTS_DIR = os.environ.get("CARBON_LENS_RESULTS", "")
+RESULTS_FORMAT = os.environ.get("CARBON_LENS_RESULTS_FORMAT", "parquet")
+
+# format name → (pyarrow.dataset format, file extension). Arrow IPC files are
+# written uncompressed so reads can map them straight into memory.
+FORMATS = {"parquet": ("parquet", "parquet"), "arrow": ("ipc", "arrow")}
+
+
+def result_schema():
+    """Row layout: when, with which factors, the 30 inputs, the commute, the result, then ESG figures"""
+    label = pa.dictionary(pa.int32(), pa.string())
+    fields = [("ts", pa.float64()), ("factor_set", label)]
+    fields += [(name, label if name == "car_type" else pa.float64()) for name in BATCH_COLUMNS]
+    fields += [("commute_factor", label), ("commute_km", pa.float64())]
+    fields += [(name, pa.float64()) for name in ["total"] + CATEGORY_COLUMNS]
+    fields += [(name, pa.int64()) for name in ESG_COLUMNS]
+    return pa.schema(fields)
+
+
+def results_table(inputs, total, breakdown, employees=1, ts=None, factor_set="", commute=None):
+    """Arrow table of results, one row per calculation.
+
+    inputs maps each BATCH_COLUMNS name to a column (or a scalar for a single
+    calculation); total and breakdown are calculate_carbon(_batch) output.
+    commute is the app's route-calculator trip as (factor key, km/day), which
+    total includes but the inputs can't express (e.g. an EV). ESG metrics are
+    derived here, so readers never need the model.
+    """
+    total = np.atleast_1d(np.asarray(total, dtype=np.float64))
+    breakdown = {c: np.atleast_1d(np.asarray(breakdown.get(c, 0.0), dtype=np.float64)) for c in CATEGORIES}
+    n = len(total)
+    ts = np.broadcast_to(np.asarray(time.time() if ts is None else ts, dtype=np.float64), (n,))
+    columns = {"ts": ts, "factor_set": _labels(np.broadcast_to(factor_set, (n,)))}
+    for name in BATCH_COLUMNS:
+        column = np.broadcast_to(np.asarray(inputs[name]), (n,))
+        columns[name] = _labels(column) if name == "car_type" else column.astype(np.float64)
+    commute_factor, commute_km = commute or ("", 0.0)
+    columns["commute_factor"] = _labels(np.broadcast_to(commute_factor, (n,)))
+    columns["commute_km"] = np.broadcast_to(np.asarray(commute_km, dtype=np.float64), (n,))
+    columns["total"] = total
+    columns.update(zip(CATEGORY_COLUMNS, (breakdown[c] for c in CATEGORIES)))
+    columns.update(esg_columns(total, breakdown, employees))
+    schema = result_schema()
+    table = pa.Table.from_arrays([pa.array(columns[f.name], type=f.type) for f in schema], schema=schema)
+    months, idx = np.unique(month_codes(ts), return_inverse=True)
+    return table.append_column("month", pa.array(month_label(months)).take(idx.astype(np.int32)))
+
+
+def _labels(values):
+    # Low-cardinality strings become dictionary columns: codes plus a few distinct labels
+    uniques, codes = np.unique(values.astype(str), return_inverse=True)
+    return pa.DictionaryArray.from_arrays(codes.astype(np.int32), uniques.tolist())
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+def write_results(table, folder, fmt=RESULTS_FORMAT):
+    """Append a results_table to a month-partitioned dataset (month=YYYY-MM/*.parquet|arrow)"""
+    format_name, ext = FORMATS[fmt]
+    ds.write_dataset(
+        table, folder, format=format_name, partitioning=_partitioning(),
+        basename_template=f"{time.time_ns()}-{uuid.uuid4().hex[:8]}-{{i}}.{ext}",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export_batch(columns, folder, fmt=RESULTS_FORMAT, factors=None, grid_factors=None,
+                 employees=1, ts=None, chunk_rows=1_000_000):
+    """Score a survey with calculate_carbon_batch and export it in chunks of chunk_rows.
+
+    columns is anything calculate_carbon_batch accepts (a DataFrame or a dict of
+    arrays); employees may be a per-row array. Returns the number of rows written.
+    """
+    factor_set = "" if factors is None else getattr(factors, "name", factors)
+    n = len(columns["car_type"])
+    for start in range(0, n, chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        chunk = {name: np.asarray(columns[name])[rows] for name in BATCH_COLUMNS}
+        grid = None if grid_factors is None else np.asarray(grid_factors)[rows]
+        chunk_employees = employees if np.ndim(employees) == 0 else np.asarray(employees)[rows]
+        total, breakdown = calculate_carbon_batch(chunk, factors, grid)
+        write_results(results_table(chunk, total, breakdown, chunk_employees, ts, factor_set), folder, fmt)
+    return n
+
+
+def open_results(folder, fmt=RESULTS_FORMAT):
+    """Arrow dataset over an export folder; files are memory-mapped, not read"""
+    format_name, _ = FORMATS[fmt]
+    schema = result_schema().append(pa.field("month", pa.string()))
+    return ds.dataset(folder, format=format_name, schema=schema, partitioning=_partitioning(),
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def read_results(folder, columns=None, filter=None, fmt=RESULTS_FORMAT):
+    """Read exported results as an Arrow table.
+
+    Only the requested columns and matching partitions are touched, e.g.
+    read_results(path, ["month", "scope1"], ds.field("month") >= "2025-04").
+    Arrow IPC columns come back as views into the mapped files (zero-copy);
+    Parquet pages are decoded into memory.
+    """
+    return open_results(folder, fmt).to_table(columns=columns, filter=filter)
@@ -0,0 +1,149 @@
+# factors.py — Versioned emission-factor sets compiled to fixed-layout vectors
+import json
+import os
+
+import numpy as np
+
+FACTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "factors")
+DEFAULT_FACTOR_SET = os.environ.get("CARBON_LENS_FACTOR_SET", "carbon-lens-2025")
+
+# Fixed index layout shared by every factor set: (key, group). The first 28 keys
+# line up one-to-one with model._FEATURES, so a set's vector doubles as the
+# batch engine's per-feature factor vector; keys after that are transport-only.
+FACTOR_LAYOUT = [
+    ("car_petrol_km", "transport"),
+    ("car_diesel_km", "transport"),
+    ("bike_km", "transport"),
+    ("auto_km", "transport"),
+    ("bus_km", "transport"),
+    ("train_km", "transport"),
+    ("flight_domestic_hr", "transport"),
+    ("flight_international_hr", "transport"),
+    ("electricity_kwh", "energy"),
+    ("lpg_cylinder", "energy"),
+    ("png_scm", "energy"),
+    ("generator_ltr", "energy"),
+    ("beef_mutton_meal", "food"),
+    ("chicken_meal", "food"),
+    ("fish_meal", "food"),
+    ("egg_daily", "food"),
+    ("veg_meal", "food"),
+    ("dairy_litre", "food"),
+    ("food_waste_kg", "food"),
+    ("water_litre", "water"),
+    ("hot_shower_min", "water"),
+    ("washing_machine_cycle", "water"),
+    ("clothing_item", "shopping"),
+    ("electronics_item", "shopping"),
+    ("online_order", "shopping"),
+    ("landfill_waste_kg", "waste"),
+    ("recycled_waste_kg", "waste"),
+    ("composting_kg", "waste"),
+    ("ev_km", "transport"),
+    ("walk_km", "transport"),
+]
+FACTOR_KEYS = [key for key, _ in FACTOR_LAYOUT]
+FACTOR_INDEX = {key: i for i, key in enumerate(FACTOR_KEYS)}
+
+
+class FactorSet:
+    """One compiled factor set.
+
+    `vector` is a read-only float64 array in FACTOR_LAYOUT order for vectorised
+    code; `values` is the same data as a tuple of Python floats for scalar code
+    (so round() keeps Python semantics).
+    """
+
+    def __init__(self, name, version, factors, description="", source=None, uncertainty=None):
+        missing = [key for key in FACTOR_KEYS if key not in factors]
+        unknown = [key for key in factors if key not in FACTOR_INDEX]
+        if missing or unknown:
+            raise ValueError(f"factor set {name!r}: missing {missing}, unknown {unknown}")
+        self.name = name
+        self.version = version
+        self.description = description
+        self.source = source
+        self.vector = np.array([factors[key] for key in FACTOR_KEYS], dtype=np.float64)
+        self.vector.flags.writeable = False
+        self.values = tuple(self.vector.tolist())
+        # Relative 95% half-range per factor (0.3 = ±30%); 0 where unknown
+        uncertainty = uncertainty or {}
+        self.uncertainty = np.array([uncertainty.get(key, 0.0) for key in FACTOR_KEYS], dtype=np.float64)
+        self.uncertainty.flags.writeable = False
+
+    def __getitem__(self, key):
+        return self.values[FACTOR_INDEX[key]]
+
+    def group(self, group):
+        """{key: factor} for one FACTOR_LAYOUT group, e.g. "energy\""""
+        return {key: self.values[i] for i, (key, g) in enumerate(FACTOR_LAYOUT) if g == group}
+
+    def __repr__(self):
+        return f"FactorSet({self.name!r}, version={self.version!r})"
+
+
+class FactorRegistry:
+    """Factor sets by name; sets are compiled once when registered"""
+
+    def __init__(self, default=DEFAULT_FACTOR_SET):
+        self.default_name = default
+        self._sets = {}
+
+    def register(self, factor_set):
+        self._sets[factor_set.name] = factor_set
+        return factor_set
+
+    def load_file(self, path):
+        """Compile a JSON factor file; "extends" names an already registered base set"""
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        factors, uncertainty = {}, {}
+        if spec.get("extends"):
+            base = self.get(spec["extends"])
+            factors.update(zip(FACTOR_KEYS, base.values))
+            uncertainty.update(zip(FACTOR_KEYS, base.uncertainty.tolist()))
+        factors.update(spec["factors"])
+        uncertainty.update(spec.get("uncertainty", {}))
+        return self.register(FactorSet(spec["name"], spec.get("version", ""), factors,
+                                       spec.get("description", ""), source=path, uncertainty=uncertainty))
+
+    def load_dir(self, folder):
+        """Load every *.json in folder, bases before the sets that extend them"""
+        pending = {}
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".json"):
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    pending[os.path.join(folder, name)] = json.load(f).get("extends")
+        while pending:
+            ready = [p for p, base in pending.items() if not base or base in self._sets]
+            if not ready:
+                raise ValueError(f"unresolved factor set bases: {sorted(set(pending.values()))}")
+            for path in ready:
+                self.load_file(path)
+                del pending[path]
+
+    def get(self, name=None):
+        """Factor set by name (the default set when name is None)"""
+        try:
+            return self._sets[name or self.default_name]
+        except KeyError:
+            raise KeyError(f"unknown factor set {name or self.default_name!r}") from None
+
+    def resolve(self, factors=None):
+        """Accept a FactorSet, a set name or None (default) and return the FactorSet"""
+        if isinstance(factors, FactorSet):
+            return factors
+        return self.get(factors)
+
+    def names(self):
+        return list(self._sets)
+
+    @property
+    def default(self):
+        return self.get()
+
+
+registry = FactorRegistry()
+registry.load_dir(FACTOR_DIR)
+if os.environ.get("CARBON_LENS_FACTOR_DIR"):
+    registry.load_dir(os.environ["CARBON_LENS_FACTOR_DIR"])
@@ -0,0 +1,178 @@
+# gazetteer.py — Offline place lookup with prefix and typo-tolerant matching
+import bisect
+import csv
+import os
+
+import numpy as np
+
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "india_places.csv")
+
+
+def normalize_name(name):
+    """Lower-case, strip punctuation and collapse whitespace"""
+    cleaned = "".join(c if c.isalnum() else " " for c in name.lower())
+    return " ".join(cleaned.split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    """Trigram Dice similarity of two strings, 0..1"""
+    ga, gb = trigrams(a), trigrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def _word_matches(word, key_words, min_score=0.5):
+    """word is one of key_words, allowing a typo in words longer than three letters"""
+    if word in key_words:
+        return True
+    return len(word) > 3 and any(dice(word, k) >= min_score for k in key_words)
+
+
+class Gazetteer:
+    """Array-backed gazetteer of named places.
+
+    Places live in parallel arrays (names, float32 coordinates); every name
+    and alias becomes a normalized key pointing at a place id. Keys are held
+    sorted together with each of their word-suffixes for prefix search, and
+    a trigram → key-id inverted index handles misspellings.
+    """
+
+    def __init__(self, places):
+        """places: iterable of (name, lat, lon, aliases)"""
+        self.names = []
+        coords = []
+        keys = {}
+        for name, lat, lon, aliases in places:
+            place_id = len(self.names)
+            self.names.append(name)
+            coords.append((lat, lon))
+            for alias in [name, *aliases]:
+                keys.setdefault(normalize_name(alias), place_id)
+        self.coords = np.array(coords, dtype=np.float32).reshape(-1, 2)
+
+        self.keys = list(keys)
+        self.key_place = np.fromiter(keys.values(), dtype=np.int32, count=len(keys))
+        self._exact = {key: i for i, key in enumerate(self.keys)}
+
+        # Every word-start suffix, so "railway" finds "coimbatore railway station"
+        suffixes = []
+        for key_id, key in enumerate(self.keys):
+            words = key.split()
+            for start in range(len(words)):
+                suffixes.append((" ".join(words[start:]), key_id))
+        suffixes.sort()
+        self._suffixes = [s for s, _ in suffixes]
+        self._suffix_key = np.array([k for _, k in suffixes], dtype=np.int32)
+
+        postings = {}
+        self._key_grams = np.empty(len(self.keys), dtype=np.int32)
+        for key_id, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self._key_grams[key_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(key_id)
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _coords(self, place_id):
+        lat, lon = self.coords[place_id]
+        return (round(float(lat), 5), round(float(lon), 5))
+
+    def _prefix_keys(self, prefix, limit):
+        lo = bisect.bisect_left(self._suffixes, prefix)
+        hi = bisect.bisect_right(self._suffixes, prefix + "\uffff", lo)
+        seen = []
+        for key_id in self._suffix_key[lo:hi]:
+            if key_id not in seen:
+                seen.append(int(key_id))
+                if len(seen) == limit:
+                    break
+        return seen
+
+    def _fuzzy_keys(self, query, limit, min_score):
+        grams = trigrams(query)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        scores = 2 * shared / (len(grams) + self._key_grams)  # Dice coefficient
+        best = np.argsort(-scores)[:limit]
+        return [(int(k), float(scores[k])) for k in best if scores[k] >= min_score]
+
+    def resolve(self, location_name, min_score=0.75):
+        """(lat, lon) for an exact or misspelled name match, else None.
+
+        A fuzzy candidate only counts when its words and the query's words
+        match one-for-one (typos allowed), so neither "Coimbatore South" nor
+        a generic "Railway Station" lands on some specific place; a tie
+        between places is None too. suggest() is the loose path.
+        """
+        query = normalize_name(location_name)
+        key_id = self._exact.get(query)
+        if key_id is not None:
+            return self._coords(self.key_place[key_id])
+        words = query.split()
+        matches = []
+        for candidate, score in self._fuzzy_keys(query, 10, min_score):
+            key_words = self.keys[candidate].split()
+            if all(_word_matches(w, key_words) for w in words) and all(_word_matches(k, words) for k in key_words):
+                matches.append((score, int(self.key_place[candidate])))
+        if not matches:
+            return None
+        places = {place for score, place in matches if score >= matches[0][0] - 1e-9}
+        if len(places) > 1:
+            return None
+        return self._coords(places.pop())
+
+    def suggest(self, text, limit=5):
+        """Autocomplete place names for partially typed (or misspelled) text"""
+        query = normalize_name(text)
+        if not query:
+            return []
+        key_ids = self._prefix_keys(query, limit * 3)
+        if not key_ids:
+            key_ids = [k for k, _ in self._fuzzy_keys(query, limit * 3, 0.4)]
+        suggestions = []
+        for key_id in key_ids:
+            name = self.names[self.key_place[key_id]]
+            if name not in suggestions:
+                suggestions.append(name)
+        return suggestions[:limit]
+
+
+def load_csv(path):
+    """Gazetteer from a name,lat,lon[,kind,aliases] CSV; aliases are |-separated"""
+    with open(path, newline="", encoding="utf-8") as f:
+        places = [
+            (row["name"], float(row["lat"]), float(row["lon"]),
+             [a for a in (row.get("aliases") or "").split("|") if a])
+            for row in csv.DictReader(f)
+        ]
+    return Gazetteer(places)
+
+
+def load_geonames(path, country_code="IN", feature_classes=("P", "S")):
+    """Gazetteer from a GeoNames dump (e.g. IN.txt) — populated places and spots
+    such as stations and campuses by default"""
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 9 or fields[8] != country_code or fields[6] not in feature_classes:
+                continue
+            aliases = [fields[2]] + [a for a in fields[3].split(",") if a.isascii() and a]
+            places.append((fields[1], float(fields[4]), float(fields[5]), aliases))
+    return Gazetteer(places)
+
+
+def load_gazetteer(path=BUNDLED_GAZETTEER):
+    """Load a CSV or GeoNames .txt gazetteer, picking the format from the extension"""
+    if path.endswith(".txt"):
+        return load_geonames(path)
+    return load_csv(path)
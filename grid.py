@@ -0,0 +1,118 @@
+# grid.py — State / DISCOM grid intensity looked up by pincode, optionally by month
+import csv
+import os
+
+import numpy as np
+
+GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "grid")
+BUNDLED_REGIONS = os.path.join(GRID_DIR, "regions.csv")
+BUNDLED_PINCODES = os.path.join(GRID_DIR, "pincodes.csv")
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+PINCODE_SPACE = 1_000_000
+
+
+class GridIntensity:
+    """Pincode → region → kg CO₂/kWh, as two flat arrays.
+
+    `region_of` has one int16 slot per 6-digit pincode (-1 when unmapped) and
+    `table` is (regions + 1) x 13 float64: column 0 is the annual factor,
+    columns 1-12 the months. The extra last row is all NaN, so an unmapped
+    pincode (-1) indexes it without a branch.
+    """
+
+    def __init__(self, regions, prefixes):
+        """regions: iterable of (region_id, state, discom, annual, monthly or None);
+        prefixes: iterable of (pincode prefix, region_id), 1-6 digits each"""
+        self.ids, self.states, self.discoms = [], [], []
+        rows = []
+        for region_id, state, discom, annual, monthly in regions:
+            self.ids.append(region_id)
+            self.states.append(state)
+            self.discoms.append(discom)
+            months = [annual if m is None else m for m in (monthly or [None] * 12)]
+            rows.append([annual, *months])
+        rows.append([np.nan] * 13)
+        self.table = np.array(rows, dtype=np.float64)
+        self._index = {region_id: i for i, region_id in enumerate(self.ids)}
+
+        # Shorter prefixes first so "560" (a DISCOM) overrides "56" (its state)
+        self.region_of = np.full(PINCODE_SPACE, -1, dtype=np.int16)
+        for prefix, region_id in sorted(prefixes, key=lambda p: len(p[0])):
+            span = 10 ** (6 - len(prefix))
+            start = int(prefix) * span
+            self.region_of[start:start + span] = self._index[region_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def region(self, pincode):
+        """Region id for a pincode, or None when it is unknown or malformed"""
+        code = parse_pincodes([pincode])[0]
+        if code < 0:
+            return None
+        i = self.region_of[code]
+        return self.ids[i] if i >= 0 else None
+
+    def describe(self, region_id):
+        """Label such as "Tamil Nadu — TANGEDCO" for a region id"""
+        i = self._index[region_id]
+        return f"{self.states[i]} — {self.discoms[i]}" if self.discoms[i] else self.states[i]
+
+    def factor(self, pincode, month=None):
+        """kg CO₂/kWh for a pincode (month 1-12 or None for the annual figure), else None"""
+        region_id = self.region(pincode)
+        if region_id is None:
+            return None
+        return float(self.table[self._index[region_id], month or 0])
+
+    def lookup(self, pincodes, months=None):
+        """Vectorised factor lookup; NaN where the pincode is unknown.
+
+        pincodes may be ints or digit strings; months is None, a scalar or an
+        array of 1-12 (0 = annual).
+        """
+        codes = parse_pincodes(pincodes)
+        regions = np.where(codes >= 0, self.region_of[np.maximum(codes, 0)], -1)
+        columns = 0 if months is None else np.asarray(months, dtype=np.intp)
+        return self.table[regions, columns]
+
+
+def parse_pincodes(pincodes):
+    """Array of 6-digit pincodes as int64, -1 where an entry isn't a valid pincode"""
+    codes = np.asarray(pincodes)
+    if codes.dtype.kind in "USO":
+        text = np.char.strip(codes.astype(str))
+        valid = (np.char.str_len(text) == 6) & np.char.isdigit(text)
+        out = np.full(len(text), -1, dtype=np.int64)
+        out[valid] = text[valid].astype(np.int64)
+        return out
+    codes = codes.astype(np.int64)
+    return np.where((codes >= 100_000) & (codes < PINCODE_SPACE), codes, -1)
+
+
+def load_grid(regions_path=BUNDLED_REGIONS, pincodes_path=BUNDLED_PINCODES):
+    """GridIntensity from a regions CSV (region,state,discom,annual,jan..dec) and a
+    prefix,region CSV; blank month cells fall back to the annual factor"""
+    regions = []
+    with open(regions_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            monthly = [float(row[m]) if row.get(m) else None for m in MONTHS]
+            regions.append((row["region"], row["state"], row["discom"], float(row["annual"]), monthly))
+    with open(pincodes_path, newline="", encoding="utf-8") as f:
+        prefixes = [(row["prefix"], row["region"]) for row in csv.DictReader(f)]
+    return GridIntensity(regions, prefixes)
+
+
+_grid = None
+
+
+def get_grid():
+    """The bundled grid table, loaded on first use"""
+    global _grid
+    if _grid is None:
+        _grid = load_grid(
+            os.environ.get("CARBON_LENS_GRID_REGIONS", BUNDLED_REGIONS),
+            os.environ.get("CARBON_LENS_GRID_PINCODES", BUNDLED_PINCODES),
+        )
+    return _grid
@@ -0,0 +1,297 @@
+# history.py — Append-only footprint history with monthly trends and fleet aggregates
+import abc
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from cache import CACHE_DIR
+from lazy_import import lazy_import
+from model import CATEGORIES
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+ds = lazy_import("pyarrow.dataset")
+
+# Opt-in: set CARBON_LENS_HISTORY to a *.sqlite3 file or a Parquet folder ("default" for
+# CACHE_DIR/history.sqlite3) to keep per-user history; unset or "off" keeps none
+HISTORY_PATH = os.environ.get("CARBON_LENS_HISTORY", "off")
+if HISTORY_PATH == "default":
+    HISTORY_PATH = os.path.join(CACHE_DIR, "history.sqlite3")
+# HMAC secret for user_key; set it so stored keys can't be checked against guessed emails
+HISTORY_SECRET = os.environ.get("CARBON_LENS_HISTORY_SECRET", "")
+
+# One column per category, in CATEGORIES order
+CATEGORY_COLUMNS = ["transport", "energy", "food", "water", "shopping", "waste"]
+VALUE_COLUMNS = ["total"] + CATEGORY_COLUMNS
+
+
+def user_key(identity):
+    """Opaque store key for a user identity (account id or history key) — the raw
+    identity is never stored: HMAC-SHA256 under CARBON_LENS_HISTORY_SECRET"""
+    return hmac.new(HISTORY_SECRET.encode(), identity.encode(), hashlib.sha256).hexdigest()
+
+
+def new_history_key():
+    """A random history key to hand an anonymous user; unguessable, unlike a name or email"""
+    return secrets.token_urlsafe(12)
+
+
+def month_codes(ts):
+    """Array of unix timestamps → int64 months since 1970-01 (UTC)"""
+    return np.asarray(ts, dtype="float64").astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+
+def month_label(codes):
+    """month_codes output → "YYYY-MM" strings"""
+    return np.asarray(codes, dtype=np.int64).astype("datetime64[M]").astype(str)
+
+
+class HistoryStore(abc.ABC):
+    """Append-only store of calculated footprints, one row per (user, ts).
+
+    Backends implement _append_rows and _scan (columns → NumPy arrays, filtered
+    by user and time; "user" comes back as per-scan integer codes); every query
+    below is computed on those columns.
+    """
+
+    def append(self, user, total, breakdown, ts=None, factor_set=""):
+        self.append_many([{
+            "user": user, "ts": time.time() if ts is None else ts, "total": total,
+            "factor_set": factor_set,
+            **{col: breakdown.get(cat, 0.0) for col, cat in zip(CATEGORY_COLUMNS, CATEGORIES)},
+        }])
+
+    def append_many(self, records):
+        """Append dicts with user, ts, total, factor_set and the category columns"""
+        if records:
+            self._append_rows(records)
+
+    def history(self, user, since=None, until=None):
+        """A user's entries, oldest first, as a dict of column arrays"""
+        return self._scan(["ts", "factor_set"] + VALUE_COLUMNS, user, since, until, ordered=True)
+
+    def monthly_trend(self, user, since=None, until=None):
+        """Per-month mean footprint for one user: [{"month", "entries", "total", <category>...}]"""
+        cols = self._scan(["ts"] + VALUE_COLUMNS, user, since, until)
+        return _monthly_means(cols)
+
+    def category_deltas(self, user):
+        """Change in each category (and total) from the user's previous month to the latest"""
+        trend = self.monthly_trend(user)
+        if len(trend) < 2:
+            return {}
+        previous, latest = trend[-2], trend[-1]
+        deltas = {"total": round(latest["total"] - previous["total"], 2)}
+        for col, cat in zip(CATEGORY_COLUMNS, CATEGORIES):
+            deltas[cat] = round(latest[col] - previous[col], 2)
+        return deltas
+
+    def monthly_summary(self, since=None, until=None):
+        """Across all users: per-month entries, distinct users and mean footprint"""
+        cols = self._scan(["user", "ts"] + VALUE_COLUMNS, None, since, until)
+        summary = _monthly_means(cols)
+        if summary:
+            months, month_idx = np.unique(month_codes(cols["ts"]), return_inverse=True)
+            n_users = int(cols["user"].max()) + 1
+            pairs = np.unique(month_idx.astype(np.int64) * n_users + cols["user"])
+            users = np.bincount(pairs // n_users, minlength=len(months))
+            for row, count in zip(summary, users.tolist()):
+                row["users"] = count
+        return summary
+
+    @abc.abstractmethod
+    def _append_rows(self, records):
+        """Persist a list of append_many records"""
+
+    @abc.abstractmethod
+    def _scan(self, columns, user=None, since=None, until=None, ordered=False):
+        """{column: NumPy array} for rows matching user and since <= ts < until"""
+
+
+def _monthly_means(cols):
+    if len(cols["ts"]) == 0:
+        return []
+    months, idx = np.unique(month_codes(cols["ts"]), return_inverse=True)
+    entries = np.bincount(idx, minlength=len(months))
+    rows = [{"month": m, "entries": int(n)} for m, n in zip(month_label(months).tolist(), entries.tolist())]
+    for col in VALUE_COLUMNS:
+        means = np.bincount(idx, weights=cols[col], minlength=len(months)) / entries
+        for row, value in zip(rows, means.tolist()):
+            row[col] = round(value, 2)
+    return rows
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """SQLite table with an index on (user, ts); good for per-user queries"""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS footprints (user TEXT NOT NULL, ts REAL NOT NULL, "
+                "factor_set TEXT, " + ", ".join(f"{c} REAL NOT NULL" for c in VALUE_COLUMNS) + ")"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS footprints_user_ts ON footprints (user, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS footprints_ts ON footprints (ts)")
+
+    def _append_rows(self, records):
+        columns = ["user", "ts", "factor_set"] + VALUE_COLUMNS
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO footprints ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(r.get(c, "") if c == "factor_set" else r[c] for c in columns) for r in records],
+            )
+
+    def _scan(self, columns, user=None, since=None, until=None, ordered=False):
+        where, params = [], []
+        if user is not None:
+            where.append("user = ?")
+            params.append(user)
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        sql = f"SELECT {', '.join(columns)} FROM footprints"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if ordered:
+            sql += " ORDER BY ts"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        values = list(zip(*rows)) if rows else [[] for _ in columns]
+        if "user" in columns:
+            i = columns.index("user")
+            codes = {}
+            values[i] = [codes.setdefault(u, len(codes)) for u in values[i]]
+        return _to_columns(columns, values)
+
+    def monthly_summary(self, since=None, until=None):
+        # A row store pays per row to hand columns to Python; aggregate in SQLite instead
+        where, params = [], []
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        sql = (
+            "SELECT strftime('%Y-%m', ts, 'unixepoch') AS month, COUNT(*), "
+            + ", ".join(f"AVG({c})" for c in VALUE_COLUMNS)
+            + ", COUNT(DISTINCT user) FROM footprints"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " GROUP BY month ORDER BY month"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"month": month, "entries": entries, **{c: round(v, 2) for c, v in zip(VALUE_COLUMNS, values)},
+             "users": users}
+            for month, entries, *values, users in rows
+        ]
+
+
+class ParquetHistoryStore(HistoryStore):
+    """Directory of Parquet files partitioned by month (month=YYYY-MM/*.parquet).
+
+    Queries read only the columns they need and let Arrow skip partitions and
+    row groups by month, user and ts statistics, so fleet-wide aggregates are
+    columnar scans. Each append writes a small file; compact() merges a
+    month's files into one, sorted by (user, ts).
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _schema(self):
+        return pa.schema([("user", pa.string()), ("ts", pa.float64()), ("factor_set", pa.string())]
+                         + [(c, pa.float64()) for c in VALUE_COLUMNS])
+
+    def _append_rows(self, records):
+        table = pa.Table.from_pylist(
+            [{**r, "factor_set": r.get("factor_set", "")} for r in records], schema=self._schema()
+        )
+        months = month_label(month_codes(table.column("ts").to_numpy()))
+        for month in np.unique(months):
+            part = table.filter(pa.array(months == month))
+            self._write(month, part.sort_by([("user", "ascending"), ("ts", "ascending")]))
+
+    def _write(self, month, table, name=None):
+        path = os.path.join(self.folder, f"month={month}")
+        os.makedirs(path, exist_ok=True)
+        name = name or f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        pq.write_table(table, os.path.join(path, name + ".tmp"))
+        os.replace(os.path.join(path, name + ".tmp"), os.path.join(path, name))
+
+    def _dataset(self):
+        month = pa.schema([("month", pa.string())])
+        return ds.dataset(self.folder, format="parquet", schema=pa.unify_schemas([self._schema(), month]),
+                          partitioning=ds.partitioning(month, flavor="hive"))
+
+    def _scan(self, columns, user=None, since=None, until=None, ordered=False):
+        expr = None
+        for cond in (
+            ds.field("user") == user if user is not None else None,
+            ds.field("ts") >= since if since is not None else None,
+            ds.field("ts") < until if until is not None else None,
+            ds.field("month") >= str(month_label(month_codes([since]))[0]) if since is not None else None,
+        ):
+            if cond is not None:
+                expr = cond if expr is None else expr & cond
+        table = self._dataset().to_table(columns=columns, filter=expr)
+        if ordered:
+            table = table.sort_by("ts")
+        values = []
+        for c in columns:
+            column = table.column(c)
+            if c == "user":
+                column = column.dictionary_encode().combine_chunks().indices
+            values.append(column.to_numpy(zero_copy_only=False))
+        return _to_columns(columns, values)
+
+    def compact(self):
+        """Merge each month's small append files into a single sorted file"""
+        for entry in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, entry)
+            files = [f for f in os.listdir(path) if f.endswith(".parquet")] if entry.startswith("month=") else []
+            if len(files) > 1:
+                table = pq.read_table([os.path.join(path, f) for f in files], schema=self._schema())
+                self._write(entry[len("month="):], table.sort_by([("user", "ascending"), ("ts", "ascending")]),
+                            name=f"compacted-{time.time_ns()}.parquet")
+                for f in files:
+                    os.remove(os.path.join(path, f))
+
+
+def _to_columns(columns, values):
+    out = {}
+    for name, column in zip(columns, values):
+        dtype = {"user": np.int64, "factor_set": object}.get(name, np.float64)
+        out[name] = np.asarray(column, dtype=dtype)
+    return out
+
+
+def open_history_store(path=HISTORY_PATH):
+    """SQLite store for *.sqlite3 / *.db paths, Parquet directory otherwise; None if
+    disabled ("off") or not writable"""
+    if path == "off":
+        return None
+    try:
+        if path.endswith((".sqlite3", ".db")):
+            return SQLiteHistoryStore(path)
+        return ParquetHistoryStore(path)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,34 @@
+# lazy_import.py — Defer heavy imports until a feature first touches them
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in that imports the real module on first attribute access.
+
+    It is deliberately kept out of sys.modules until then: Streamlit (like
+    other libraries) probes sys.modules for "pandas" and friends, and a
+    lazy entry there would trigger the very import we are deferring.
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return module `name`, importing it only when an attribute is first used.
+
+    Use for heavy dependencies that only some features need (plotting,
+    HTTP, TTS), so a cold Streamlit worker can paint the input form before
+    paying for them. Once loaded the module lives in sys.modules like any
+    other import, so later reruns pay nothing.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name.partition(".")[0]) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return LazyModule(name)
@@ -0,0 +1,300 @@
+# metrics.py — Lightweight latency histograms, counters and timing spans for hot paths
+import bisect
+import functools
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+# Spans also cover sub-millisecond work (the emission model, cache hits)
+SPAN_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS
+
+# Spans and counters are no-ops unless CARBON_LENS_METRICS is set (or a
+# CARBON_LENS_METRICS_FILE to export to); explicit Histogram.observe calls always record
+METRICS_FILE = os.environ.get("CARBON_LENS_METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.environ.get("CARBON_LENS_METRICS_FILE_INTERVAL", "10"))
+_enabled = os.environ.get("CARBON_LENS_METRICS", "0") not in ("", "0", "off") or bool(METRICS_FILE)
+
+# name → Histogram / Counter / Gauge, in registration order, for export
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+
+def enable(flag=True):
+    """Turn span timing and counters on or off for the whole process"""
+    global _enabled
+    _enabled = flag
+
+
+def enabled():
+    return _enabled
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (Prometheus-style upper bounds, in seconds)"""
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS, help=""):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (None when empty)"""
+        with self._lock:
+            if not self._count:
+                return None
+            target = q * self._count
+            seen = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+                seen += count
+                if seen >= target:
+                    return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, seen = {}, 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+                seen += count
+                cumulative[bound] = seen
+            count, total = self._count, self._sum
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+    def prometheus(self):
+        snap = self.snapshot()
+        lines = [f"# HELP {self.name} {self.help or self.name}", f"# TYPE {self.name} histogram"]
+        for bound, seen in snap["buckets"].items():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {seen}')
+        lines.append(f"{self.name}_sum {snap['sum']}")
+        lines.append(f"{self.name}_count {snap['count']}")
+        return lines
+
+
+class Counter:
+    """Thread-safe counter with optional labels, e.g. hits.inc(source="disk")"""
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._values = {}  # sorted label items → count
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not _enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def snapshot(self):
+        """{"label=value,...": count} ("" for the unlabelled series)"""
+        with self._lock:
+            items = list(self._values.items())
+        return {",".join(f"{k}={v}" for k, v in key): count for key, count in sorted(items)}
+
+    def prometheus(self):
+        lines = [f"# HELP {self.name} {self.help or self.name}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, count in items:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+            lines.append(f"{self.name}{{{labels}}} {count}" if labels else f"{self.name} {count}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at export time, e.g. a circuit breaker's state.
+
+    fn returns a number, or {label value: number} for a series per value of
+    `label`. kind="counter" exports a monotonic total kept elsewhere.
+    """
+
+    def __init__(self, name, fn, help="", label=None, kind="gauge"):
+        self.name = name
+        self.fn = fn
+        self.help = help
+        self.label = label
+        self.kind = kind
+
+    def snapshot(self):
+        return self.fn()
+
+    def prometheus(self):
+        lines = [f"# HELP {self.name} {self.help or self.name}", f"# TYPE {self.name} {self.kind}"]
+        values = self.fn()
+        if not isinstance(values, dict):
+            return lines + [f"{self.name} {values}"]
+        for value, number in values.items():
+            lines.append(f'{self.name}{{{self.label}="{_escape(value)}"}} {number}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _register(cls, name, **kwargs):
+    metric = REGISTRY.get(name)
+    if isinstance(metric, cls):
+        return metric
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = cls(name, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name!r} is already a {type(metric).__name__}")
+        return metric
+
+
+def histogram(name, help="", buckets=DEFAULT_BUCKETS):
+    """The process-wide Histogram called `name`, created on first use"""
+    return _register(Histogram, name, help=help, buckets=buckets)
+
+
+def counter(name, help=""):
+    """The process-wide Counter called `name`, created on first use"""
+    return _register(Counter, name, help=help)
+
+
+def gauge(name, fn, help="", label=None, kind="gauge"):
+    """Register a callback Gauge called `name` (the first registration wins)"""
+    return _register(Gauge, name, fn=fn, help=help, label=label, kind=kind)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("name", "histogram", "start")
+
+    def __init__(self, name, histogram):
+        self.name = name
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        # GeneratorExit is a consumer stopping early (a span inside a generator), not a failure
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            _span_errors.inc(span=self.name, error=exc_type.__name__)
+        return False
+
+
+_span_errors = counter("carbon_lens_span_errors_total", "Exceptions raised out of a timed span")
+
+
+def span(name):
+    """Context manager timing a block into the carbon_lens_<name>_seconds histogram.
+
+    Exceptions that escape the block are counted in carbon_lens_span_errors_total
+    and re-raised. Returns a shared no-op when metrics are disabled.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, histogram(f"carbon_lens_{name}_seconds", f"Time spent in {name}", SPAN_BUCKETS))
+
+
+def timed(name):
+    """Decorator form of span(); disabled metrics cost one flag check per call"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def prometheus_text():
+    """Every registered metric in the Prometheus text exposition format (0.0.4)"""
+    with _registry_lock:
+        metrics = list(REGISTRY.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.prometheus())
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path=None):
+    """Atomically write prometheus_text() to path (default CARBON_LENS_METRICS_FILE),
+    e.g. for node_exporter's textfile collector"""
+    path = path or METRICS_FILE
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+_last_write = 0.0
+
+
+def maybe_write_textfile():
+    """write_textfile() to CARBON_LENS_METRICS_FILE at most once per METRICS_FILE_INTERVAL seconds"""
+    global _last_write
+    if not METRICS_FILE or time.monotonic() - _last_write < METRICS_FILE_INTERVAL:
+        return False
+    _last_write = time.monotonic()
+    try:
+        write_textfile(METRICS_FILE)
+    except OSError:
+        return False
+    return True
+
+
+class RerunTimer:
+    """Splits one script run into named laps, e.g. per section of a Streamlit rerun"""
+
+    def __init__(self):
+        self.start = self._last = time.perf_counter()
+        self.laps = []
+
+    def lap(self, name):
+        """Record the time since the previous lap (or since creation) under `name`"""
+        now = time.perf_counter()
+        self.laps.append((name, now - self._last))
+        if _enabled:
+            histogram(f"carbon_lens_rerun_{name}_seconds", f"Rerun time spent in the {name} section",
+                      SPAN_BUCKETS).observe(now - self._last)
+        self._last = now
+
+    def breakdown_ms(self):
+        """[(name, milliseconds), ...] in lap order, ending with the running total"""
+        rows = [(name, seconds * 1000) for name, seconds in self.laps]
+        rows.append(("total", (time.perf_counter() - self.start) * 1000))
+        return rows
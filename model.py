@@ -1,100 +1,82 @@
-TRANSPORT_FACTORS = {
-    "car_petrol_km": 0.21,
-    "car_diesel_km": 0.17,
-    "bike_km": 0.09,
-    "auto_km": 0.10,
-    "bus_km": 0.04,
-    "train_km": 0.01,
-    "flight_domestic_hr": 255.0,
-    "flight_international_hr": 195.0,
-}
-ENERGY_FACTORS = {
-    "electricity_kwh": 0.82,
-    "lpg_cylinder": 63.0,
-    "png_scm": 2.04,
-    "generator_ltr": 2.68,
-}
-FOOD_FACTORS = {
-    "beef_mutton_meal": 3.6,
-    "chicken_meal": 1.5,
-    "fish_meal": 1.2,
-    "egg_daily": 0.5,
-    "veg_meal": 0.5,
-    "dairy_litre": 3.2,
-    "food_waste_kg": 2.5,
-}
-WATER_FACTORS = {
-    "water_litre": 0.0003,
-    "hot_shower_min": 0.08,
-    "washing_machine_cycle": 0.6,
-}
-SHOPPING_FACTORS = {
-    "clothing_item": 10.0,
-    "electronics_item": 70.0,
-    "online_order": 0.5,
-}
-WASTE_FACTORS = {
-    "landfill_waste_kg": 0.5,
-    "recycled_waste_kg": -0.1,
-    "composting_kg": -0.05,
-}
+from collections import namedtuple
 
-def calculate_carbon(
-    car_type, car_km, bike_km, auto_km, bus_km, train_km,
-    domestic_flights, domestic_flight_hrs,
-    international_flights, international_flight_hrs,
-    electricity_kwh, lpg_cylinders, png_scm, generator_ltrs,
-    beef_mutton_meals, chicken_meals, fish_meals,
-    eggs_per_day, veg_meals, dairy_litres, food_waste_kg,
-    water_litres, shower_mins, washing_cycles,
-    clothing_items, electronics_items, online_orders,
-    landfill_kg, recycled_kg, composting_kg
-):
-    if car_type == "Diesel":
-        car_factor = TRANSPORT_FACTORS["car_diesel_km"]
-    elif car_type == "Petrol":
-        car_factor = TRANSPORT_FACTORS["car_petrol_km"]
+import numpy as np
+
+from factors import FACTOR_INDEX, registry
+from metrics import timed
+
+# Default factor set by category, for display and backwards compatibility;
+# calculations read whichever set they are given (see factors.py)
+TRANSPORT_FACTORS = registry.default.group("transport")
+ENERGY_FACTORS = registry.default.group("energy")
+FOOD_FACTORS = registry.default.group("food")
+WATER_FACTORS = registry.default.group("water")
+SHOPPING_FACTORS = registry.default.group("shopping")
+WASTE_FACTORS = registry.default.group("waste")
+
+@timed("calculate")
+def calculate_record(record, factors=None, grid_factor=None):
+    """Annual kg CO₂ and per-category breakdown for one ActivityRecord.
+
+    `factors` is a FactorSet or set name; `grid_factor` (kg CO₂/kWh, e.g. from
+    grid.get_grid().factor(pincode)) replaces the set's electricity factor.
+    """
+    r = record
+    f = registry.resolve(factors)
+    # The model's factors lead FACTOR_LAYOUT in _FEATURES order (asserted below);
+    # one unpack is far cheaper than a FactorSet lookup per term
+    (car_petrol_km_f, car_diesel_km_f, bike_km_f, auto_km_f, bus_km_f, train_km_f,
+     flight_domestic_hr_f, flight_international_hr_f, electricity_kwh_f, lpg_cylinder_f, png_scm_f,
+     generator_ltr_f, beef_mutton_meal_f, chicken_meal_f, fish_meal_f, egg_daily_f, veg_meal_f,
+     dairy_litre_f, food_waste_kg_f, water_litre_f, hot_shower_min_f, washing_machine_cycle_f,
+     clothing_item_f, electronics_item_f, online_order_f, landfill_waste_kg_f, recycled_waste_kg_f,
+     composting_kg_f) = f.values[:len(_FEATURES)]
+    electricity_factor = electricity_kwh_f if grid_factor is None else grid_factor
+    if r.car_type == "Diesel":
+        car_factor = car_diesel_km_f
+    elif r.car_type == "Petrol":
+        car_factor = car_petrol_km_f
     else:
         car_factor = 0
 
     transport = (
-        (car_km * car_factor * 365) +
-        (bike_km * TRANSPORT_FACTORS["bike_km"] * 365) +
-        (auto_km * TRANSPORT_FACTORS["auto_km"] * 365) +
-        (bus_km * TRANSPORT_FACTORS["bus_km"] * 365) +
-        (train_km * TRANSPORT_FACTORS["train_km"] * 365) +
-        (domestic_flights * domestic_flight_hrs * TRANSPORT_FACTORS["flight_domestic_hr"]) +
-        (international_flights * international_flight_hrs * TRANSPORT_FACTORS["flight_international_hr"])
+        (r.car_km * car_factor * 365) +
+        (r.bike_km * bike_km_f * 365) +
+        (r.auto_km * auto_km_f * 365) +
+        (r.bus_km * bus_km_f * 365) +
+        (r.train_km * train_km_f * 365) +
+        (r.domestic_flights * r.domestic_flight_hrs * flight_domestic_hr_f) +
+        (r.international_flights * r.international_flight_hrs * flight_international_hr_f)
     )
     energy = (
-        (electricity_kwh * ENERGY_FACTORS["electricity_kwh"] * 12) +
-        (lpg_cylinders * ENERGY_FACTORS["lpg_cylinder"] * 12) +
-        (png_scm * ENERGY_FACTORS["png_scm"] * 12) +
-        (generator_ltrs * ENERGY_FACTORS["generator_ltr"] * 12)
+        (r.electricity_kwh * electricity_factor * 12) +
+        (r.lpg_cylinders * lpg_cylinder_f * 12) +
+        (r.png_scm * png_scm_f * 12) +
+        (r.generator_ltrs * generator_ltr_f * 12)
     )
     food = (
-        (beef_mutton_meals * FOOD_FACTORS["beef_mutton_meal"] * 52) +
-        (chicken_meals * FOOD_FACTORS["chicken_meal"] * 52) +
-        (fish_meals * FOOD_FACTORS["fish_meal"] * 52) +
-        (eggs_per_day * FOOD_FACTORS["egg_daily"] * 365) +
-        (veg_meals * FOOD_FACTORS["veg_meal"] * 52) +
-        (dairy_litres * FOOD_FACTORS["dairy_litre"] * 52) +
-        (food_waste_kg * FOOD_FACTORS["food_waste_kg"] * 52)
+        (r.beef_mutton_meals * beef_mutton_meal_f * 52) +
+        (r.chicken_meals * chicken_meal_f * 52) +
+        (r.fish_meals * fish_meal_f * 52) +
+        (r.eggs_per_day * egg_daily_f * 365) +
+        (r.veg_meals * veg_meal_f * 52) +
+        (r.dairy_litres * dairy_litre_f * 52) +
+        (r.food_waste_kg * food_waste_kg_f * 52)
     )
     water = (
-        (water_litres * WATER_FACTORS["water_litre"] * 365) +
-        (shower_mins * WATER_FACTORS["hot_shower_min"] * 365) +
-        (washing_cycles * WATER_FACTORS["washing_machine_cycle"] * 52)
+        (r.water_litres * water_litre_f * 365) +
+        (r.shower_mins * hot_shower_min_f * 365) +
+        (r.washing_cycles * washing_machine_cycle_f * 52)
     )
     shopping = (
-        (clothing_items * SHOPPING_FACTORS["clothing_item"] * 12) +
-        (electronics_items * SHOPPING_FACTORS["electronics_item"]) +
-        (online_orders * SHOPPING_FACTORS["online_order"] * 52)
+        (r.clothing_items * clothing_item_f * 12) +
+        (r.electronics_items * electronics_item_f) +
+        (r.online_orders * online_order_f * 52)
     )
     waste = (
-        (landfill_kg * WASTE_FACTORS["landfill_waste_kg"] * 52) +
-        (recycled_kg * WASTE_FACTORS["recycled_waste_kg"] * 52) +
-        (composting_kg * WASTE_FACTORS["composting_kg"] * 52)
+        (r.landfill_kg * landfill_waste_kg_f * 52) +
+        (r.recycled_kg * recycled_waste_kg_f * 52) +
+        (r.composting_kg * composting_kg_f * 52)
     )
 
     total = transport + energy + food + water + shopping + waste
@@ -110,6 +92,31 @@ def calculate_carbon(
     return round(total, 2), breakdown
 
 
+def calculate_carbon(
+    car_type, car_km, bike_km, auto_km, bus_km, train_km,
+    domestic_flights, domestic_flight_hrs,
+    international_flights, international_flight_hrs,
+    electricity_kwh, lpg_cylinders, png_scm, generator_ltrs,
+    beef_mutton_meals, chicken_meals, fish_meals,
+    eggs_per_day, veg_meals, dairy_litres, food_waste_kg,
+    water_litres, shower_mins, washing_cycles,
+    clothing_items, electronics_items, online_orders,
+    landfill_kg, recycled_kg, composting_kg, factors=None, grid_factor=None
+):
+    """calculate_record with the inputs as separate arguments (see ActivityRecord)"""
+    return calculate_record(ActivityRecord(
+        car_type, car_km, bike_km, auto_km, bus_km, train_km,
+        domestic_flights, domestic_flight_hrs,
+        international_flights, international_flight_hrs,
+        electricity_kwh, lpg_cylinders, png_scm, generator_ltrs,
+        beef_mutton_meals, chicken_meals, fish_meals,
+        eggs_per_day, veg_meals, dairy_litres, food_waste_kg,
+        water_litres, shower_mins, washing_cycles,
+        clothing_items, electronics_items, online_orders,
+        landfill_kg, recycled_kg, composting_kg,
+    ), factors, grid_factor)
+
+
 def get_recommendations(breakdown, total):
     recommendations = []
     sorted_categories = sorted(breakdown.items(), key=lambda x: x[1], reverse=True)
@@ -142,4 +149,236 @@ def get_recommendations(breakdown, total):
 
     recommendations.append("🌳 Plant 2 trees this year — each absorbs ~22kg CO₂/year")
     recommendations.append("📱 Track monthly using Carbon Lens to measure progress!")
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+# ─── BATCH ENGINE ─────────────────────────────────────────────────────────────
+CATEGORIES = ["🚗 Transport", "⚡ Energy", "🍽️ Food", "💧 Water", "🛍️ Shopping", "🗑️ Waste"]
+
+# Input columns accepted by calculate_carbon_batch — same names as calculate_carbon's parameters
+BATCH_COLUMNS = [
+    "car_type", "car_km", "bike_km", "auto_km", "bus_km", "train_km",
+    "domestic_flights", "domestic_flight_hrs",
+    "international_flights", "international_flight_hrs",
+    "electricity_kwh", "lpg_cylinders", "png_scm", "generator_ltrs",
+    "beef_mutton_meals", "chicken_meals", "fish_meals",
+    "eggs_per_day", "veg_meals", "dairy_litres", "food_waste_kg",
+    "water_litres", "shower_mins", "washing_cycles",
+    "clothing_items", "electronics_items", "online_orders",
+    "landfill_kg", "recycled_kg", "composting_kg",
+]
+AMOUNT_COLUMNS = BATCH_COLUMNS[1:]  # everything but car_type, all numeric
+CAR_TYPES = ["None", "Petrol", "Diesel"]  # car_type values; ActivityColumns stores their index
+
+# Feature layout: (feature, category index, factor key, annual multiplier).
+# Car km is split by fuel and flights are pre-multiplied by hours so every term is linear.
+# Features are grouped by category and kept in the same order as calculate_carbon's sums,
+# which is also the order of the first len(_FEATURES) entries of factors.FACTOR_LAYOUT.
+_FEATURES = [
+    ("car_petrol_km", 0, "car_petrol_km", 365),
+    ("car_diesel_km", 0, "car_diesel_km", 365),
+    ("bike_km", 0, "bike_km", 365),
+    ("auto_km", 0, "auto_km", 365),
+    ("bus_km", 0, "bus_km", 365),
+    ("train_km", 0, "train_km", 365),
+    ("domestic_flight_hours", 0, "flight_domestic_hr", 1),
+    ("international_flight_hours", 0, "flight_international_hr", 1),
+    ("electricity_kwh", 1, "electricity_kwh", 12),
+    ("lpg_cylinders", 1, "lpg_cylinder", 12),
+    ("png_scm", 1, "png_scm", 12),
+    ("generator_ltrs", 1, "generator_ltr", 12),
+    ("beef_mutton_meals", 2, "beef_mutton_meal", 52),
+    ("chicken_meals", 2, "chicken_meal", 52),
+    ("fish_meals", 2, "fish_meal", 52),
+    ("eggs_per_day", 2, "egg_daily", 365),
+    ("veg_meals", 2, "veg_meal", 52),
+    ("dairy_litres", 2, "dairy_litre", 52),
+    ("food_waste_kg", 2, "food_waste_kg", 52),
+    ("water_litres", 3, "water_litre", 365),
+    ("shower_mins", 3, "hot_shower_min", 365),
+    ("washing_cycles", 3, "washing_machine_cycle", 52),
+    ("clothing_items", 4, "clothing_item", 12),
+    ("electronics_items", 4, "electronics_item", 1),
+    ("online_orders", 4, "online_order", 52),
+    ("landfill_kg", 5, "landfill_waste_kg", 52),
+    ("recycled_kg", 5, "recycled_waste_kg", 52),
+    ("composting_kg", 5, "composting_kg", 52),
+]
+FEATURE_NAMES = [f[0] for f in _FEATURES]
+FEATURE_CATEGORY = np.array([f[1] for f in _FEATURES])
+assert [FACTOR_INDEX[f[2]] for f in _FEATURES] == list(range(len(_FEATURES)))
+MULTIPLIER_VECTOR = np.array([f[3] for f in _FEATURES], dtype=np.float64)
+ELECTRICITY_FEATURE = FEATURE_NAMES.index("electricity_kwh")
+
+
+def factor_vector(factors=None):
+    """Per-feature factors of a FactorSet (or set name) — a view, no copying or parsing"""
+    return registry.resolve(factors).vector[:len(_FEATURES)]
+
+
+def build_design_matrix(columns):
+    """Turn calculate_carbon-style input columns into the (rows x features) matrix"""
+    def col(name):
+        return np.asarray(columns[name], dtype=np.float64)
+
+    if isinstance(columns, ActivityColumns):
+        petrol = columns.car_codes == CAR_TYPES.index("Petrol")
+        diesel = columns.car_codes == CAR_TYPES.index("Diesel")
+    else:
+        car_type = np.asarray(columns["car_type"])
+        petrol, diesel = car_type == "Petrol", car_type == "Diesel"
+    car_km = col("car_km")
+    # Column-major so each feature (and the per-category sums below) is contiguous
+    features = np.empty((len(car_km), len(_FEATURES)), order="F")
+    features[:, 0] = np.where(petrol, car_km, 0.0)
+    features[:, 1] = np.where(diesel, car_km, 0.0)
+    features[:, 6] = col("domestic_flights") * col("domestic_flight_hrs")
+    features[:, 7] = col("international_flights") * col("international_flight_hrs")
+    for i, name in enumerate(FEATURE_NAMES):
+        if i not in (0, 1, 6, 7):
+            features[:, i] = col(name)
+    return features
+
+
+def round_half_even(values, decimals=2):
+    """np.round that agrees with Python's round() on every element.
+
+    np.round scales before rounding, so it can disagree with round() right on
+    a .xx5 boundary; those few elements are re-rounded in Python.
+    """
+    rounded = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_half] = [round(v, decimals) for v in values[near_half].tolist()]
+    return rounded
+
+
+def category_totals(features, factors=None, grid_factors=None):
+    """Per-category emissions (rows x categories), summed in calculate_carbon's order"""
+    vector = factor_vector(factors)
+    terms = features * vector
+    if grid_factors is not None:
+        # Per-row electricity factors; NaN (unknown pincode) keeps the set's factor
+        grid_factors = np.asarray(grid_factors, dtype=np.float64)
+        terms[:, ELECTRICITY_FEATURE] = features[:, ELECTRICITY_FEATURE] * np.where(
+            np.isnan(grid_factors), vector[ELECTRICITY_FEATURE], grid_factors)
+    terms *= MULTIPLIER_VECTOR
+    per_category = np.zeros((len(features), len(CATEGORIES)), order="F")
+    for i, category in enumerate(FEATURE_CATEGORY):
+        per_category[:, category] += terms[:, i]
+    return per_category
+
+
+@timed("calculate_batch")
+def calculate_carbon_batch(columns, factors=None, grid_factors=None):
+    """Vectorised calculate_carbon over an ActivityColumns, a DataFrame or a dict of NumPy arrays.
+
+    Takes one column per calculate_carbon parameter (see BATCH_COLUMNS) and
+    returns (total, breakdown): a total array and a dict of per-category arrays.
+    `factors` picks the factor set, as for calculate_carbon; `grid_factors` is an
+    optional per-row kg CO₂/kWh array such as grid.get_grid().lookup(pincodes).
+    Terms are multiplied and summed in the same order as the scalar function,
+    so every row matches calculate_carbon exactly.
+    """
+    per_category = category_totals(build_design_matrix(columns), factors, grid_factors)
+    total = per_category[:, 0].copy()
+    for i in range(1, len(CATEGORIES)):
+        total += per_category[:, i]
+    breakdown = {
+        name: round_half_even(per_category[:, i]) for i, name in enumerate(CATEGORIES)
+    }
+    return round_half_even(total), breakdown
+
+# ─── ACTIVITY RECORDS ─────────────────────────────────────────────────────────
+
+
+class ActivityRecord(namedtuple("ActivityRecord", BATCH_COLUMNS, defaults=["None"] + [0] * len(AMOUNT_COLUMNS))):
+    """One person's calculate_carbon inputs, as fields named after BATCH_COLUMNS.
+
+    Build it positionally (BATCH_COLUMNS order) or by name; omitted amounts are 0
+    and car_type defaults to "None"; unknown names raise TypeError. Being a tuple
+    with empty __slots__, it costs one pointer per input, is built in C, and
+    calculate_record reads its fields directly.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_mapping(cls, inputs):
+        """Record from a dict (or DataFrame row) of inputs; missing ones get the defaults"""
+        return cls(**{name: inputs[name] for name in BATCH_COLUMNS if name in inputs})
+
+
+class ActivityColumns:
+    """calculate_carbon inputs for many people, stored column-wise.
+
+    Amounts live in one (rows x AMOUNT_COLUMNS) float64 array and car_type as a
+    uint8 index into CAR_TYPES, i.e. 233 bytes per person. It reads like a dict
+    of columns (columns["car_km"] is a view), so calculate_carbon_batch,
+    esg.ESGAggregator and export.results_table take it as is.
+    """
+
+    __slots__ = ("amounts", "car_codes")
+
+    def __init__(self, rows=0):
+        # Column-major, like build_design_matrix, so each input is contiguous
+        self.amounts = np.zeros((rows, len(AMOUNT_COLUMNS)), order="F")
+        self.car_codes = np.zeros(rows, dtype=np.uint8)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """From a DataFrame or dict of arrays; missing columns are 0 ("None" for car_type)"""
+        n = len(next((columns[name] for name in BATCH_COLUMNS if name in columns), []))
+        out = cls(n)
+        for i, name in enumerate(AMOUNT_COLUMNS):
+            if name in columns:
+                out.amounts[:, i] = np.asarray(columns[name], dtype=np.float64)
+        if "car_type" in columns:
+            out.car_codes[:] = car_type_codes(columns["car_type"])
+        return out
+
+    @classmethod
+    def from_records(cls, records):
+        """From a sequence of ActivityRecords"""
+        records = list(records)
+        out = cls(len(records))
+        if records:
+            out.amounts[:] = [r[1:] for r in records]
+            out.car_codes[:] = car_type_codes([r.car_type for r in records])
+        return out
+
+    def __len__(self):
+        return len(self.car_codes)
+
+    def __contains__(self, name):
+        return name in _COLUMN_INDEX
+
+    def __getitem__(self, name):
+        if name == "car_type":
+            return _CAR_TYPE_LABELS[self.car_codes]
+        return self.amounts[:, _AMOUNT_INDEX[name]]
+
+    def keys(self):
+        return list(BATCH_COLUMNS)
+
+    def record(self, i):
+        """Row i as an ActivityRecord"""
+        return ActivityRecord(CAR_TYPES[self.car_codes[i]], *self.amounts[i].tolist())
+
+    def set_record(self, i, record):
+        """Overwrite row i with an ActivityRecord"""
+        self.amounts[i] = record[1:]
+        self.car_codes[i] = car_type_codes([record.car_type])[0]
+
+
+_COLUMN_INDEX = {name: i for i, name in enumerate(BATCH_COLUMNS)}
+_AMOUNT_INDEX = {name: i for i, name in enumerate(AMOUNT_COLUMNS)}
+_CAR_TYPE_LABELS = np.array(CAR_TYPES)
+
+
+def car_type_codes(car_types):
+    """car_type strings → uint8 indices into CAR_TYPES; unknown values count as "None" """
+    car_types = np.asarray(car_types)
+    codes = np.zeros(len(car_types), dtype=np.uint8)
+    for code, name in enumerate(CAR_TYPES[1:], start=1):
+        codes[car_types == name] = code
+    return codes
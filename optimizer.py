@@ -0,0 +1,138 @@
+# optimizer.py — Rank feasible lifestyle changes by CO₂ saved per unit of effort or cost
+from collections import namedtuple
+
+import numpy as np
+
+from whatif import ACTIVITY_INDEX, ACTIVITY_NAMES, PRIVATE_TRANSPORT, SOLAR_KWH_PER_KW_MONTH
+
+# Slider ranges from the app's input tabs, per activity (flight features are flights x hours)
+SLIDER_BOUNDS = {
+    "domestic_flight_hours": (0, 50 * 5),
+    "international_flight_hours": (0, 20 * 20),
+    "electricity_kwh": (0, 1000),
+    "lpg_cylinders": (0, 10),
+    "png_scm": (0, 50),
+    "generator_ltrs": (0, 50),
+    "beef_mutton_meals": (0, 21),
+    "chicken_meals": (0, 21),
+    "fish_meals": (0, 21),
+    "eggs_per_day": (0, 10),
+    "veg_meals": (0, 21),
+    "dairy_litres": (0, 10),
+    "food_waste_kg": (0, 10),
+    "water_litres": (0, 500),
+    "shower_mins": (0, 60),
+    "washing_cycles": (0, 14),
+    "clothing_items": (0, 20),
+    "electronics_items": (0, 20),
+    "online_orders": (0, 30),
+    "landfill_kg": (0, 20),
+    "recycled_kg": (0, 20),
+    "composting_kg": (0, 10),
+}
+
+# One lever = one kind of change, tried at every step size up to its bounds.
+# sources are drained in order; target (if any) receives the same amount.
+# effort is in rough "habit points" per step (1 ≈ one weekly habit changed);
+# cost is one-off rupees per step; max_share caps the change at a share of the
+# current amount (nobody gives up electricity entirely); display_step is one step
+# in `unit` when that differs from the source's unit (1 kW of solar = 120 kWh/month).
+Lever = namedtuple("Lever", "key label sources target step unit effort cost max_share display_step",
+                   defaults=(1.0, None))
+
+LEVERS = [
+    Lever("beef_to_veg", "Swap beef / mutton meals for vegetarian", ["beef_mutton_meals"], "veg_meals", 1, "meals/week", 1.0, 0),
+    Lever("chicken_to_veg", "Swap chicken meals for vegetarian", ["chicken_meals"], "veg_meals", 1, "meals/week", 0.8, 0),
+    Lever("fish_to_veg", "Swap fish meals for vegetarian", ["fish_meals"], "veg_meals", 1, "meals/week", 0.6, 0),
+    Lever("less_dairy", "Drink less dairy", ["dairy_litres"], None, 1, "litres/week", 0.8, 0, 0.5),
+    Lever("less_food_waste", "Plan meals to waste less food", ["food_waste_kg"], None, 1, "kg/week", 0.5, 0),
+    Lever("private_to_bus", "Take the bus instead of car / bike / auto", PRIVATE_TRANSPORT, "bus_km", 5, "km/day", 1.5, 0),
+    Lever("private_to_train", "Take the train instead of car / bike / auto", PRIVATE_TRANSPORT, "train_km", 5, "km/day", 2.0, 0),
+    Lever("fewer_domestic_flights", "Cut domestic flight hours", ["domestic_flight_hours"], None, 2, "flight hours/year", 3.0, 0),
+    Lever("fewer_international_flights", "Cut international flight hours", ["international_flight_hours"], None, 8, "flight hours/year", 5.0, 0),
+    Lever("save_electricity", "Cut electricity use (LEDs, AC at 24°C)", ["electricity_kwh"], None, 25, "kWh/month", 0.5, 0, 0.3),
+    Lever("rooftop_solar", "Install rooftop solar", ["electricity_kwh"], None, SOLAR_KWH_PER_KW_MONTH, "kW", 2.0, 50_000, 1.0, 1),
+    Lever("less_generator", "Run the diesel generator less", ["generator_ltrs"], None, 5, "litres/month", 1.0, 0),
+    Lever("shorter_showers", "Take shorter hot showers", ["shower_mins"], None, 2, "min/day", 0.3, 0, 0.5),
+    Lever("fewer_washes", "Run fuller, fewer washing machine loads", ["washing_cycles"], None, 1, "cycles/week", 0.3, 0, 0.5),
+    Lever("fewer_clothes", "Buy fewer new clothes", ["clothing_items"], None, 1, "items/month", 0.5, 0),
+    Lever("fewer_gadgets", "Repair electronics instead of replacing", ["electronics_items"], None, 1, "items/year", 1.0, 0),
+    Lever("fewer_orders", "Consolidate online orders", ["online_orders"], None, 2, "orders/week", 0.3, 0),
+    Lever("recycle_more", "Recycle instead of landfilling", ["landfill_kg"], "recycled_kg", 1, "kg/week", 0.3, 0),
+    Lever("compost_more", "Compost kitchen waste", ["landfill_kg"], "composting_kg", 1, "kg/week", 0.5, 0),
+]
+
+
+def _lever_rows(whatif, lever):
+    """(levels, delta rows) for every feasible step of one lever"""
+    available = [float(whatif.activity[ACTIVITY_INDEX[s]]) for s in lever.sources]
+    limit = sum(available) * lever.max_share
+    if lever.target in SLIDER_BOUNDS:
+        headroom = SLIDER_BOUNDS[lever.target][1] - float(whatif.activity[ACTIVITY_INDEX[lever.target]])
+        limit = min(limit, headroom)
+    levels = np.arange(1, int(limit // lever.step) + 1) * float(lever.step)
+    if len(levels) == 0:
+        return levels, np.empty((0, len(ACTIVITY_NAMES)))
+    rows = np.zeros((len(levels), len(ACTIVITY_NAMES)))
+    drained = np.zeros(len(levels))
+    for source, amount in zip(lever.sources, available):
+        take = np.clip(levels - drained, 0, amount)
+        rows[:, ACTIVITY_INDEX[source]] -= take
+        drained += take
+    if lever.target:
+        rows[:, ACTIVITY_INDEX[lever.target]] += drained
+    return levels, rows
+
+
+def optimize(whatif, top_n=5, per="effort", levers=LEVERS):
+    """Top interventions for one user's WhatIf baseline.
+
+    Every lever is tried at each step within the app's slider bounds, all
+    candidates are scored in one evaluate_many call, and each lever keeps its
+    best level: highest kg CO₂ saved per effort point (per="effort") or per
+    ₹1000 (per="cost", where free changes rank first), ties going to the
+    larger saving. Returns a list of dicts, best first.
+    """
+    lever_ids, levels, blocks = [], [], []
+    for i, lever in enumerate(levers):
+        lever_levels, rows = _lever_rows(whatif, lever)
+        lever_ids.append(np.full(len(lever_levels), i))
+        levels.append(lever_levels)
+        blocks.append(rows)
+    lever_ids = np.concatenate(lever_ids)
+    if len(lever_ids) == 0:
+        return []
+    levels = np.concatenate(levels)
+    totals, _ = whatif.evaluate_many(np.vstack(blocks))
+    saved = whatif.total - totals
+
+    steps = levels / np.array([lever.step for lever in levers])[lever_ids]
+    effort = steps * np.array([lever.effort for lever in levers])[lever_ids]
+    cost = steps * np.array([lever.cost for lever in levers])[lever_ids]
+    if per == "cost":
+        score = np.divide(saved, cost / 1000, out=np.full(len(saved), np.inf), where=cost > 0)
+    else:
+        score = saved / effort
+
+    # Best level per lever: sort by (lever, score, saved) and keep each lever's last row
+    order = np.lexsort((saved, np.round(score, 9), lever_ids))
+    last = np.r_[lever_ids[order][1:] != lever_ids[order][:-1], True]
+    best = order[last]
+    best = best[saved[best] > 0.5]
+    best = best[np.lexsort((-saved[best], -score[best]))][:top_n]
+
+    results = []
+    for row in best:
+        lever = levers[lever_ids[row]]
+        amount = steps[row] * (lever.display_step or lever.step)
+        results.append({
+            "lever": lever.key,
+            "label": lever.label,
+            "amount": round(float(amount), 2),
+            "unit": lever.unit,
+            "saved_kg": round(float(saved[row]), 2),
+            "effort": round(float(effort[row]), 2),
+            "cost_inr": round(float(cost[row])),
+            "score": float(score[row]),
+        })
+    return results
@@ -0,0 +1,54 @@
+# rate_limiter.py — Process-wide token bucket for rate-limited upstream APIs
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket that sleeps only when the budget is exhausted.
+
+    Each caller reserves the next free token under a lock and then sleeps
+    outside it, so waiting callers are served in arrival order and the
+    combined request rate never exceeds `rate` per second (plus `capacity`
+    burst).
+    """
+
+    def __init__(self, rate=1.0, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _reserve(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.calls += 1
+            if wait > 0:
+                self.waited_calls += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available; returns the seconds spent waiting"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "waited_calls": self.waited_calls,
+            "total_wait_s": round(self.total_wait, 3),
+            "mean_wait_s": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+            "max_wait_s": round(self.max_wait, 3),
+        }
@@ -0,0 +1,101 @@
+# resilience.py — Pooled HTTP sessions, jittered retries and a circuit breaker
+import random
+import threading
+import time
+
+from lazy_import import lazy_import
+
+requests = lazy_import("requests")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class RetryableStatus(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def make_session(pool_size=10):
+    """requests.Session with a keep-alive pool of `pool_size` connections per host"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open) and
+    its outcome closes or re-opens the circuit."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.CLOSED:
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # Late failures from calls already in flight must not push out the reset window
+            if self.state != self.OPEN and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+                self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+def call_with_retries(fn, retries=2, base_delay=0.25, max_delay=2.0, histogram=None):
+    """Call fn() (which returns a requests.Response) retrying connection errors
+    and 429/5xx with full-jitter exponential backoff. Read timeouts are not retried:
+    the caller has already waited out the read timeout once."""
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            response = fn()
+            if response.status_code not in RETRY_STATUS:
+                return response
+            error = RetryableStatus(response)
+            response.close()
+        except requests.ConnectionError as e:
+            error = e
+        finally:
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - start)
+        if attempt < retries:
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+    raise error
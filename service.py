@@ -0,0 +1,371 @@
+# service.py — Headless JSON/HTTP scoring service for the emission model (stdlib asyncio)
+# Usage: python service.py [--host 127.0.0.1] [--port 8080] [--metrics]
+import argparse
+import asyncio
+import json
+import os
+import time
+from http import HTTPStatus
+
+import numpy as np
+
+from factors import registry
+from grid import get_grid
+from metrics import counter, enable, prometheus_text, span
+from model import BATCH_COLUMNS, ActivityRecord, calculate_carbon_batch, calculate_record, get_recommendations
+from transport_tracker import calculate_distance_async, calculate_transport_emission
+
+HOST = os.environ.get("CARBON_LENS_SERVICE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("CARBON_LENS_SERVICE_PORT", "8080"))
+MAX_BODY_BYTES = int(os.environ.get("CARBON_LENS_SERVICE_MAX_BODY", str(1 << 20)))
+MAX_BATCH_BODY_BYTES = int(os.environ.get("CARBON_LENS_SERVICE_MAX_BATCH_BODY", str(16 << 20)))
+MAX_BATCH_RECORDS = int(os.environ.get("CARBON_LENS_SERVICE_MAX_BATCH", "50000"))
+MAX_CONCURRENCY = int(os.environ.get("CARBON_LENS_SERVICE_CONCURRENCY", "64"))
+MAX_CONNECTIONS = int(os.environ.get("CARBON_LENS_SERVICE_MAX_CONNECTIONS", "1024"))
+KEEPALIVE_TIMEOUT = float(os.environ.get("CARBON_LENS_SERVICE_KEEPALIVE", "15"))
+MAX_HEADER_BYTES = 16 << 10
+
+# Defaults for omitted calculate_carbon inputs (as in ActivityRecord)
+INPUT_DEFAULTS = {name: "None" if name == "car_type" else 0 for name in BATCH_COLUMNS}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+        self.body_read = False  # set once the request body has been consumed
+
+
+def _reject_constant(name):
+    raise HTTPError(400, f"{name} is not a valid number")
+
+
+def _parse(raw):
+    try:
+        body = json.loads(raw or b"{}", parse_constant=_reject_constant)
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON") from None
+    if not isinstance(body, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return body
+
+
+def _run(handler, raw):
+    return handler(_parse(raw))
+
+
+def _get(body, name, kind, default=None, what=None):
+    """body[name] if it is of the given type(s), else a 400; default when absent or null"""
+    value = body.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool):
+        raise HTTPError(400, f"{name} must be {what or 'a number'}")
+    return value
+
+
+def _object(body, name):
+    if name in body and body[name] is None:
+        raise HTTPError(400, f"{name} must be an object")
+    return _get(body, name, dict, {}, "an object")
+
+
+def _list(body, name):
+    if name in body and body[name] is None:
+        raise HTTPError(400, f"{name} must be a list")
+    return _get(body, name, list, [], "a list")
+
+
+NUMBER = (int, float)
+
+
+def _finite(*values):
+    """400 when a computed figure overflowed (e.g. car_km of 1e308), rather than answering NaN / Infinity"""
+    for value in values:
+        if not np.isfinite(value).all():
+            raise HTTPError(400, "inputs are too large to score")
+
+
+def _options(body):
+    """Factor set and grid factor from a request body ("factors", "grid_factor" / "pincode")"""
+    factors = _get(body, "factors", str, what="a factor set name")
+    if factors is not None and factors not in registry.names():
+        raise HTTPError(400, f"unknown factor set {factors!r}")
+    grid_factor = _get(body, "grid_factor", NUMBER)
+    pincode = _get(body, "pincode", (str, int), what="a string or number")
+    if grid_factor is None and pincode:
+        grid_factor = get_grid().factor(pincode)
+    return factors, grid_factor
+
+
+def _check_inputs(names):
+    unknown = set(names) - set(BATCH_COLUMNS)
+    if unknown:
+        raise HTTPError(400, f"unknown inputs: {sorted(unknown)}")
+
+
+def _check_record(record):
+    """One calculate_carbon input object: known names, numeric amounts, text car_type"""
+    if not isinstance(record, dict):
+        raise HTTPError(400, "inputs must be objects")
+    _check_inputs(record)
+    for name in record:
+        if name == "car_type":
+            _get(record, name, str, what="a string")
+        else:
+            _get(record, name, NUMBER)
+
+
+def calculate(body):
+    """{"inputs": {...}, "factors"?, "pincode"?} → {"total", "breakdown"}"""
+    factors, grid_factor = _options(body)
+    inputs = _object(body, "inputs")
+    _check_record(inputs)
+    # null amounts count as omitted
+    record = ActivityRecord(**{name: value for name, value in inputs.items() if value is not None})
+    total, breakdown = calculate_record(record, factors, grid_factor)
+    _finite(total, *breakdown.values())
+    return {"total": total, "breakdown": breakdown}
+
+
+def recommendations(body):
+    """{"breakdown", "total"} (or calculate's body) → {"recommendations": [...]}"""
+    if "breakdown" not in body:
+        body = calculate(body)
+    breakdown = _object(body, "breakdown")
+    if not breakdown:
+        raise HTTPError(400, "empty breakdown")
+    # null categories count as zero, as null inputs do in calculate()
+    breakdown = {name: _get(breakdown, name, NUMBER, 0) for name in breakdown}
+    total = _get(body, "total", NUMBER, sum(breakdown.values()))
+    _finite(total)
+    return {"recommendations": get_recommendations(breakdown, total)}
+
+
+def _defaults(values, default):
+    """null amounts count as omitted, as in calculate(); the common no-null list is passed through"""
+    return [default if v is None else v for v in values] if None in values else values
+
+
+def batch(body):
+    """Score many people at once on the vectorised path.
+
+    Accepts {"columns": {input: [...]}} (cheapest) or {"records": [{...}, ...]},
+    plus optional "factors" and per-row "pincodes". Returns columnar results:
+    {"count", "total": [...], "breakdown": {category: [...]}}.
+    """
+    factors, _ = _options({"factors": body.get("factors")})
+    if "columns" in body:
+        given = _object(body, "columns")
+        _check_inputs(given)
+        for name in given:
+            _list(given, name)
+        n = len(next(iter(given.values()), []))
+        columns = {name: np.asarray(_defaults(given[name], INPUT_DEFAULTS[name]))
+                   if name in given else np.full(n, INPUT_DEFAULTS[name])
+                   for name in BATCH_COLUMNS}
+    else:
+        records = _list(body, "records")
+        n = len(records)
+        if n > MAX_BATCH_RECORDS:
+            raise HTTPError(413, f"batch of {n} exceeds {MAX_BATCH_RECORDS} records")
+        for record in records:
+            _check_record(record)
+        columns = {name: np.asarray(_defaults([r.get(name, default) for r in records], default))
+                   for name, default in INPUT_DEFAULTS.items()}
+    if n > MAX_BATCH_RECORDS:
+        raise HTTPError(413, f"batch of {n} exceeds {MAX_BATCH_RECORDS} records")
+    if any(len(c) != n for c in columns.values()):
+        raise HTTPError(400, "columns differ in length")
+    pincodes = _list(body, "pincodes")
+    if pincodes and len(pincodes) != n:
+        raise HTTPError(400, "pincodes differ in length from the inputs")
+    grid_factors = get_grid().lookup(np.asarray(pincodes)) if pincodes else None
+    try:
+        total, breakdown = calculate_carbon_batch(columns, factors, grid_factors)
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, str(e)) from None
+    _finite(total)
+    return {"count": n, "total": total.tolist(), "breakdown": {k: v.tolist() for k, v in breakdown.items()}}
+
+
+async def distance(body):
+    """{"from", "to", "vehicle_type"?, "trips_per_day"?, "factors"?} → distance and annual emission"""
+    origin = _get(body, "from", str, what="a place name")
+    destination = _get(body, "to", str, what="a place name")
+    if not origin or not destination:
+        raise HTTPError(400, "from and to are required")
+    vehicle_type = _get(body, "vehicle_type", str, "", "a string")
+    trips_per_day = _get(body, "trips_per_day", NUMBER, 2)
+    factors, _ = _options({"factors": body.get("factors")})
+    km, error = await calculate_distance_async(origin, destination)
+    if error:
+        raise HTTPError(404, error)
+    emission = calculate_transport_emission(km, vehicle_type, trips_per_day, factors)
+    _finite(emission)
+    return {"distance_km": km, "annual_kg": emission}
+
+
+service_requests = counter("carbon_lens_service_requests_total", "Scoring service responses by route and status")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# path → (handler, is_async, max body bytes)
+ROUTES = {
+    "/calculate": (calculate, False, MAX_BODY_BYTES),
+    "/recommendations": (recommendations, False, MAX_BODY_BYTES),
+    "/distance": (distance, True, MAX_BODY_BYTES),
+    "/batch": (batch, False, MAX_BATCH_BODY_BYTES),
+}
+
+
+class ScoringService:
+    """HTTP/1.1 server with keep-alive, per-route body limits and bounded concurrency.
+
+    At most `concurrency` requests are handled at once (others wait their turn
+    on their own connection); connections beyond `max_connections` get a 503.
+    """
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, max_connections=MAX_CONNECTIONS,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT):
+        self.concurrency = asyncio.Semaphore(concurrency)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.connections = 0
+        self.requests = 0
+        self.started = time.time()
+
+    async def serve(self, host=HOST, port=PORT):
+        """Start listening; returns the asyncio server (port=0 picks a free port)"""
+        return await asyncio.start_server(self._connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+
+    async def _connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            # Take the request head first so the client sees the 503 rather than a reset
+            try:
+                await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 1.0)
+                await self._respond(writer, 503, {"error": "too many connections"}, keep_alive=False)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            writer.close()
+            return
+        self.connections += 1
+        try:
+            while await self._request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _request(self, reader, writer):
+        """Handle one request; returns whether to keep the connection open"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False
+        except asyncio.LimitOverrunError:
+            await self._respond(writer, 431, {"error": "headers too large"}, keep_alive=False)
+            return False
+        try:
+            request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+            method, path, version = request_line.split(" ")
+            headers = {}
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            await self._respond(writer, 400, {"error": "malformed request"}, keep_alive=False)
+            return False
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        try:
+            status, payload = await self._dispatch(method, path.split("?", 1)[0], headers, reader)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+            # A body left unread would be parsed as the next request
+            has_body = headers.get("content-length", "0").strip() != "0" or "transfer-encoding" in headers
+            keep_alive = keep_alive and (e.body_read or not has_body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            status, payload, keep_alive = 500, {"error": f"{type(e).__name__}: {e}"}, False
+        self.requests += 1
+        route = path.split("?", 1)[0]
+        service_requests.inc(route=route if route in ROUTES or route in ("/health", "/metrics") else "other",
+                             status=status)
+        await self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _dispatch(self, method, path, headers, reader):
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "requests": self.requests, "connections": self.connections,
+                         "uptime_s": round(time.time() - self.started, 1)}
+        if path == "/metrics" and method == "GET":
+            return 200, prometheus_text()
+        if path not in ROUTES:
+            raise HTTPError(404)
+        if method != "POST":
+            raise HTTPError(405)
+        handler, is_async, max_body = ROUTES[path]
+        if "chunked" in headers.get("transfer-encoding", "").lower() or "content-length" not in headers:
+            raise HTTPError(411)
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length") from None
+        if length > max_body:
+            raise HTTPError(413, f"body over {max_body} bytes")
+        raw = await reader.readexactly(length)
+        try:
+            async with self.concurrency:
+                with span(f"service{path.replace('/', '_')}"):
+                    if is_async:
+                        return 200, await handler(_parse(raw))
+                    # Parsing and scoring (up to a whole /batch) stay off the event loop
+                    return 200, await asyncio.to_thread(_run, handler, raw)
+        except HTTPError as e:
+            e.body_read = True
+            raise
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        # str payloads are Prometheus text (/metrics); everything else is JSON
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), PROMETHEUS_CONTENT_TYPE
+        else:
+            try:
+                data = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode()
+            except ValueError:
+                # Handlers reject non-finite results; never put NaN / Infinity on the wire regardless
+                status, data = 500, b'{"error": "result is not finite"}'
+            content_type = "application/json; charset=utf-8"
+        writer.write(
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+
+async def main(host=HOST, port=PORT):
+    server = await ScoringService().serve(host, port)
+    print(f"Carbon Lens scoring service on http://{server.sockets[0].getsockname()[0]}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carbon Lens JSON scoring service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--metrics", action="store_true", help="Record spans and counters for GET /metrics "
+                        "(also on with CARBON_LENS_METRICS=1)")
+    args = parser.parse_args()
+    if args.metrics:
+        enable()
+    try:
+        asyncio.run(main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
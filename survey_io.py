@@ -0,0 +1,47 @@
+# survey_io.py — Survey input columns from Arrow tables, shared by batch_score.py and esg.py
+import numpy as np
+
+from lazy_import import lazy_import
+from model import BATCH_COLUMNS
+
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+
+# Optional per-row columns understood alongside the inputs, with their null defaults
+EXTRA_DEFAULTS = {"department": "", "employees": 1, "pincode": ""}
+TEXT_COLUMNS = ("car_type", "department", "pincode")
+
+
+def input_types():
+    """Arrow type of every known input column: text for TEXT_COLUMNS, float64 otherwise.
+
+    Readers infer types per block, so a column that is blank throughout one
+    block comes back as null, and JSON pincodes come back as integers; every
+    block is pinned (or cast) to these instead.
+    """
+    types = {name: pa.float64() for name in BATCH_COLUMNS + list(EXTRA_DEFAULTS)}
+    types.update({name: pa.string() for name in TEXT_COLUMNS})
+    return types
+
+
+def inputs_from_arrow(batch):
+    """calculate_carbon_batch columns from an Arrow table or record batch.
+
+    Missing inputs and empty cells become 0 ("None" for car_type); the optional
+    department / employees / pincode columns are passed through when present.
+    """
+    names = batch.schema.names
+    types = input_types()
+
+    def column(name, default):
+        values = batch.column(name).cast(types[name])
+        return pc.fill_null(values, default).to_numpy(zero_copy_only=False)
+
+    columns = {}
+    for name in BATCH_COLUMNS:
+        default = "None" if name == "car_type" else 0.0
+        columns[name] = column(name, default) if name in names else np.full(batch.num_rows, default)
+    for name, default in EXTRA_DEFAULTS.items():
+        if name in names:
+            columns[name] = column(name, default)
+    return columns
@@ -1,33 +1,144 @@
 # transport_tracker.py — Auto Distance Calculator using OpenStreetMap (No API Key!)
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-import time
-
-# Emission factors (kg CO2 per km)
-EMISSION_FACTORS = {
-    "Car (Petrol)": 0.21,
-    "Car (Diesel)": 0.17,
-    "Motorbike": 0.09,
-    "Auto Rickshaw": 0.10,
-    "Public Bus": 0.04,
-    "Train": 0.01,
-    "Electric Vehicle": 0.02,
-    "Bicycle / Walking": 0.0,
+from cache import CACHE_DIR, MISSING, TTLCache, TieredCache, open_disk_cache
+from rate_limiter import TokenBucket
+from gazetteer import BUNDLED_GAZETTEER, load_gazetteer
+from factors import FACTOR_INDEX, registry
+from metrics import counter, span
+import asyncio
+import os
+import threading
+
+# Vehicle choices → factor-set keys (kg CO2 per km); unknown vehicles count as a petrol car
+VEHICLE_FACTOR_KEYS = {
+    "Car (Petrol)": "car_petrol_km",
+    "Car (Diesel)": "car_diesel_km",
+    "Motorbike": "bike_km",
+    "Auto Rickshaw": "auto_km",
+    "Public Bus": "bus_km",
+    "Train": "train_km",
+    "Electric Vehicle": "ev_km",
+    "Bicycle / Walking": "walk_km",
 }
+FALLBACK_VEHICLE_KEY = "car_petrol_km"
+VEHICLE_FACTOR_INDEX = {vehicle: FACTOR_INDEX[key] for vehicle, key in VEHICLE_FACTOR_KEYS.items()}
+
+# Emission factors (kg CO2 per km) from the default factor set
+EMISSION_FACTORS = {vehicle: registry.default[key] for vehicle, key in VEHICLE_FACTOR_KEYS.items()}
+
+# Geocode cache — memory LRU in front of a SQLite file shared across workers
+GEOCODE_CACHE_PATH = os.environ.get(
+    "CARBON_LENS_GEOCODE_CACHE", os.path.join(CACHE_DIR, "geocode.sqlite3")
+)
+geocode_cache = TieredCache(
+    TTLCache(maxsize=4096, ttl=7 * 24 * 3600),
+    open_disk_cache(GEOCODE_CACHE_PATH, "geocode", ttl=90 * 24 * 3600),
+)
+
+# Frequently searched places, used to pre-warm the geocode cache
+COMMON_LANDMARKS = [
+    "Coimbatore Railway Station", "Karunya University", "Coimbatore International Airport",
+    "Gandhipuram Bus Stand", "Chennai Central", "Chennai International Airport",
+    "Bengaluru City Railway Station", "Kempegowda International Airport",
+    "Mumbai CSMT", "Chhatrapati Shivaji Maharaj International Airport",
+    "New Delhi Railway Station", "Indira Gandhi International Airport",
+    "Howrah Junction", "Hyderabad Deccan Railway Station", "Rajiv Gandhi International Airport",
+    "Pune Junction", "Ahmedabad Junction", "Madurai Junction", "Tiruchirappalli Junction",
+    "Ernakulam Junction", "IIT Madras", "Anna University", "PSG College of Technology",
+]
+
+# Nominatim's usage policy allows 1 request/second for the whole application,
+# so every geocoder call in this process shares one bucket
+geocode_limiter = TokenBucket(rate=1.0, capacity=1)
+
+# Where each get_coordinates answer came from: cache, gazetteer, nominatim, not_found or error
+geocode_lookups = counter("carbon_lens_geocode_lookups_total", "Location lookups by source")
+
+# Offline gazetteer tried before the network — a CSV or GeoNames dump, or "off"
+GAZETTEER_PATH = os.environ.get("CARBON_LENS_GAZETTEER", BUNDLED_GAZETTEER)
+
+_geolocator = None
+_gazetteer = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def _get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        # Deferred: importing geopy pulls in every geocoder it ships
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent="carbon_lens_tracker")
+    return _geolocator
+
+
+def _get_gazetteer():
+    global _gazetteer, _gazetteer_loaded
+    if _gazetteer_loaded:
+        return _gazetteer
+    # Both endpoints of calculate_distance_async look up at once; the second
+    # must wait for the load rather than see no gazetteer and go to Nominatim
+    with _gazetteer_lock:
+        if not _gazetteer_loaded:
+            if GAZETTEER_PATH != "off":
+                try:
+                    _gazetteer = load_gazetteer(GAZETTEER_PATH)
+                except (OSError, ValueError, KeyError):
+                    _gazetteer = None
+            _gazetteer_loaded = True
+    return _gazetteer
+
+
+def suggest_locations(text, limit=5):
+    """Autocomplete suggestions for a partially typed location"""
+    gazetteer = _get_gazetteer()
+    if gazetteer is None or not text:
+        return []
+    return gazetteer.suggest(text, limit)
+
+
+def normalize_location(location_name):
+    """Cache key for a location — case and whitespace insensitive"""
+    return " ".join(location_name.lower().split())
+
 
 def get_coordinates(location_name):
     """Convert location name to coordinates using OpenStreetMap"""
+    key = normalize_location(location_name)
+    cached = geocode_cache.get(key)
+    if cached is not MISSING:
+        geocode_lookups.inc(source="cache")
+        return tuple(cached)
+    gazetteer = _get_gazetteer()
+    if gazetteer is not None:
+        coords = gazetteer.resolve(location_name)
+        if coords:
+            geocode_cache.set(key, list(coords))
+            geocode_lookups.inc(source="gazetteer")
+            return coords
     try:
-        geolocator = Nominatim(user_agent="carbon_lens_tracker")
-        time.sleep(1)  # Required delay for Nominatim free service
-        location = geolocator.geocode(location_name)
+        geolocator = _get_geolocator()
+        geocode_limiter.acquire()  # Nominatim free service allows 1 request/second
+        with span("geocode"):
+            location = geolocator.geocode(location_name)
         if location:
-            return (location.latitude, location.longitude)
+            coords = (location.latitude, location.longitude)
+            geocode_cache.set(key, list(coords))
+            geocode_lookups.inc(source="nominatim")
+            return coords
         else:
+            geocode_lookups.inc(source="not_found")
             return None
     except Exception as e:
+        geocode_lookups.inc(source="error")
         return None
 
+
+def prewarm_geocode_cache(locations=COMMON_LANDMARKS):
+    """Geocode any locations not yet cached so later lookups skip the network"""
+    for location in locations:
+        get_coordinates(location)
+    return geocode_cache.stats()
+
 def calculate_distance(from_location, to_location):
     """Calculate distance between two locations in km"""
     from_coords = get_coordinates(from_location)
@@ -38,11 +149,31 @@ def calculate_distance(from_location, to_location):
     if not to_coords:
         return None, f"Could not find location: {to_location}"
     
+    from geopy.distance import geodesic
+    distance = geodesic(from_coords, to_coords).kilometers
+    return round(distance, 2), None
+
+async def calculate_distance_async(from_location, to_location):
+    """Calculate distance in km, geocoding both locations concurrently.
+
+    Both lookups run in worker threads and share geocode_limiter, so an
+    uncached route costs one round-trip plus at most one rate-limit wait.
+    """
+    from_coords, to_coords = await asyncio.gather(
+        asyncio.to_thread(get_coordinates, from_location),
+        asyncio.to_thread(get_coordinates, to_location),
+    )
+    if not from_coords:
+        return None, f"Could not find location: {from_location}"
+    if not to_coords:
+        return None, f"Could not find location: {to_location}"
+
+    from geopy.distance import geodesic
     distance = geodesic(from_coords, to_coords).kilometers
     return round(distance, 2), None
 
-def calculate_transport_emission(distance_km, vehicle_type, trips_per_day):
+def calculate_transport_emission(distance_km, vehicle_type, trips_per_day, factors=None):
     """Calculate annual emission from transport"""
-    factor = EMISSION_FACTORS.get(vehicle_type, 0.21)
+    factor = registry.resolve(factors)[VEHICLE_FACTOR_KEYS.get(vehicle_type, FALLBACK_VEHICLE_KEY)]
     annual_emission = distance_km * factor * trips_per_day * 365
     return round(annual_emission, 2)
\ No newline at end of file
@@ -0,0 +1,44 @@
+# uncertainty.py — Monte Carlo percentile bands for a footprint
+import numpy as np
+
+from model import CATEGORIES
+from whatif import ACTIVITY_CATEGORY
+
+DEFAULT_SAMPLES = 10_000
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+def sample_footprints(whatif, samples=DEFAULT_SAMPLES, seed=0):
+    """(samples x categories) footprints with every factor drawn from its distribution.
+
+    Each factor is lognormal around its point value (the median), with the
+    factor set's relative 95% half-range u mapped to sigma = ln(1 + u) / 1.96.
+    Only activities the user actually has are sampled.
+    """
+    rng = np.random.default_rng(seed)
+    contribution = whatif.activity * whatif.coefficient
+    sigma = np.log1p(whatif.factors.uncertainty) / 1.96
+    live = np.flatnonzero(contribution)
+    out = np.zeros((samples, len(CATEGORIES)))
+    if len(live) == 0:
+        return out
+    draws = rng.standard_normal((samples, len(live)))
+    draws *= sigma[live]
+    np.exp(draws, out=draws)
+    draws *= contribution[live]
+    for column, category in enumerate(ACTIVITY_CATEGORY[live]):
+        out[:, category] += draws[:, column]
+    return out
+
+
+def uncertainty_bands(whatif, samples=DEFAULT_SAMPLES, seed=0, percentiles=DEFAULT_PERCENTILES):
+    """Percentile bands for the total and each category.
+
+    Returns {"total": {p: kg}, "categories": {category: {p: kg}}} with values
+    rounded to whole kg; the same seed always gives the same bands.
+    """
+    per_category = sample_footprints(whatif, samples, seed)
+    totals = per_category.sum(axis=1)
+    stacked = np.percentile(np.column_stack([totals, per_category]), percentiles, axis=0)
+    bands = [dict(zip(percentiles, np.round(stacked[:, i]).tolist())) for i in range(stacked.shape[1])]
+    return {"total": bands[0], "categories": dict(zip(CATEGORIES, bands[1:]))}
@@ -0,0 +1,154 @@
+# voice.py — gTTS voice summaries with a content-addressed audio cache
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import CACHE_DIR, MISSING, SingleFlight, TTLCache
+from lazy_import import lazy_import
+from metrics import counter, span
+
+gtts = lazy_import("gtts")
+
+VOICE_CACHE_DIR = os.environ.get("CARBON_LENS_VOICE_CACHE", os.path.join(CACHE_DIR, "voice"))
+VOICE_DISK_MAX_BYTES = 256 * 2**20
+PRERENDER_VOICE = os.environ.get("CARBON_LENS_PRERENDER_VOICE", "1") != "0"
+
+# MP3 bytes keyed by sha256(lang + text); a summary is ~50-100 KB
+audio_cache = TTLCache(maxsize=512, weigher=len, max_weight=32 * 2**20)
+_inflight = SingleFlight()
+_prerender_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voice-prerender")
+
+# Where each summary came from: memory, disk, gtts, or error (the caller shows no audio)
+voice_summaries = counter("carbon_lens_voice_summaries_total", "Voice summaries by source")
+
+
+class AudioFileCache:
+    """Directory of <hash>.mp3 files, pruned oldest-first past max_bytes"""
+
+    def __init__(self, folder, max_bytes=VOICE_DISK_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.mp3")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return MISSING
+        os.utime(self._path(key))  # mark as recently used for pruning
+        return data
+
+    def set(self, key, data):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.folder):
+                if name.endswith(".mp3"):
+                    stat = os.stat(os.path.join(self.folder, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.folder, name))
+                total -= size
+
+
+def _open_disk_tier():
+    if VOICE_CACHE_DIR == "off":
+        return None
+    try:
+        return AudioFileCache(VOICE_CACHE_DIR)
+    except OSError:
+        return None
+
+
+audio_disk_cache = _open_disk_tier()
+
+
+def summary_text(total, breakdown, lang="en"):
+    """The sentence read out by the voice summary"""
+    top_category = max(breakdown, key=breakdown.get)
+    top_value = breakdown[top_category]
+    top_name = top_category.replace("🚗","").replace("⚡","").replace("🍽️","").replace("💧","").replace("🛍️","").replace("🗑️","").strip()
+
+    if lang == "ta":
+        return f"""உங்கள் வருடாந்திர கார்பன் கால்சுவடு {int(total)} கிலோகிராம் CO2 ஆகும்.
+        உங்கள் மிக அதிக உமிழ்வு பிரிவு {top_name} ஆகும், இது {int(top_value)} கிலோகிராம்.
+        உங்கள் கார்பன் கால்சுவட்டை சமன் செய்ய ஆண்டுக்கு {int(total/22)} மரங்கள் நடவேண்டும்.
+        கீழே உள்ள பரிந்துரைகளை பின்பற்றுங்கள்!"""
+    return f"""Your annual carbon footprint is {int(total)} kilograms of CO2 per year.
+        Your highest emission source is {top_name} at {int(top_value)} kilograms per year.
+        To offset your footprint, you need to plant {int(total/22)} trees every year.
+        Check the recommendations below to reduce your carbon footprint!"""
+
+
+def audio_key(text, lang):
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+def synthesize(text, lang):
+    """Uncached gTTS call returning MP3 bytes"""
+    with span("tts"):
+        tts = gtts.gTTS(text=text, lang=lang, slow=False)
+        audio_buffer = io.BytesIO()
+        tts.write_to_fp(audio_buffer)
+        return audio_buffer.getvalue()
+
+
+def _load_or_synthesize(key, text, lang):
+    if audio_disk_cache is not None:
+        data = audio_disk_cache.get(key)
+        if data is not MISSING:
+            audio_cache.set(key, data)
+            voice_summaries.inc(source="disk")
+            return data
+    data = synthesize(text, lang)
+    voice_summaries.inc(source="gtts")
+    audio_cache.set(key, data)
+    if audio_disk_cache is not None:
+        try:
+            audio_disk_cache.set(key, data)
+        except OSError:
+            pass
+    return data
+
+
+def generate_voice_summary(total, breakdown, lang="en"):
+    """Generate voice summary using gTTS — free, no API key needed.
+
+    MP3 bytes come straight from the memory or disk cache when this exact
+    summary was rendered before; a render already in progress (e.g. the
+    background pre-render) is joined rather than repeated.
+    """
+    try:
+        text = summary_text(total, breakdown, lang)
+        key = audio_key(text, lang)
+        data = audio_cache.get(key)
+        if data is MISSING:
+            data = _inflight.do(key, _load_or_synthesize, key, text, lang)
+        else:
+            voice_summaries.inc(source="memory")
+        return data, True
+    except Exception as e:
+        voice_summaries.inc(source="error")
+        return str(e), False
+
+
+def prerender_voice_summary(total, breakdown, lang="en"):
+    """Start rendering the summary in the background so the button plays instantly"""
+    if PRERENDER_VOICE:
+        _prerender_pool.submit(generate_voice_summary, total, breakdown, lang)
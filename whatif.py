@@ -0,0 +1,108 @@
+# whatif.py — Incremental what-if scenarios on top of a calculated footprint
+import numpy as np
+
+from factors import FACTOR_KEYS, registry
+from model import (CATEGORIES, ELECTRICITY_FEATURE, FEATURE_CATEGORY, FEATURE_NAMES,
+                   MULTIPLIER_VECTOR, build_design_matrix)
+
+# Activities follow factors.FACTOR_LAYOUT: the model's features, then the
+# transport-only modes a commute can be switched to (daily km, like car_km)
+ACTIVITY_NAMES = FEATURE_NAMES + FACTOR_KEYS[len(FEATURE_NAMES):]
+ACTIVITY_INDEX = {name: i for i, name in enumerate(ACTIVITY_NAMES)}
+ACTIVITY_CATEGORY = np.concatenate([FEATURE_CATEGORY, np.zeros(len(ACTIVITY_NAMES) - len(FEATURE_NAMES), dtype=int)])
+_ACTIVITY_CATEGORY = ACTIVITY_CATEGORY.tolist()
+ANNUAL_MULTIPLIER = np.concatenate([MULTIPLIER_VECTOR, np.full(len(ACTIVITY_NAMES) - len(FEATURE_NAMES), 365.0)])
+
+SOLAR_KWH_PER_KW_MONTH = 120  # ~4 kWh/kW/day, typical for Indian rooftops
+MEAT_MEALS = ["beef_mutton_meals", "chicken_meals", "fish_meals"]
+PRIVATE_TRANSPORT = ["car_petrol_km", "car_diesel_km", "bike_km", "auto_km"]
+
+
+def activities_from_inputs(**inputs):
+    """calculate_carbon keyword arguments → {activity: amount}"""
+    row = build_design_matrix({name: [value] for name, value in inputs.items()})[0]
+    return dict(zip(FEATURE_NAMES, row.tolist()))
+
+
+class WhatIf:
+    """A baseline footprint split into per-activity contribution terms.
+
+    A scenario is a sparse delta {activity: change in amount}; its footprint is
+    the baseline plus the changed terms only, so evaluating one costs O(changed
+    activities). Amounts never go below zero.
+    """
+
+    def __init__(self, activities, factors=None, grid_factor=None):
+        self.activity = np.zeros(len(ACTIVITY_NAMES))
+        for name, amount in activities.items():
+            self.activity[ACTIVITY_INDEX[name]] = amount
+        self.factors = registry.resolve(factors)
+        self.coefficient = self.factors.vector * ANNUAL_MULTIPLIER  # kg CO₂/yr per unit
+        if grid_factor is not None:
+            self.coefficient[ELECTRICITY_FEATURE] = grid_factor * ANNUAL_MULTIPLIER[ELECTRICITY_FEATURE]
+        self.contribution = self.activity * self.coefficient
+        self.category = np.bincount(ACTIVITY_CATEGORY, self.contribution, minlength=len(CATEGORIES))
+        self.total = float(self.category.sum())
+        # Plain-float copies: single scenarios touch a handful of terms, where
+        # Python arithmetic beats NumPy's per-call overhead
+        self._activity = self.activity.tolist()
+        self._coefficient = self.coefficient.tolist()
+        self._category = self.category.tolist()
+
+    def _changes(self, delta):
+        """(category index, kg CO₂/yr change) per activity in delta, clipped at zero amount"""
+        for name, change in delta.items():
+            i = ACTIVITY_INDEX[name]
+            yield _ACTIVITY_CATEGORY[i], max(change, -self._activity[i]) * self._coefficient[i]
+
+    def evaluate(self, delta):
+        """(total, breakdown) after applying one delta"""
+        category = self._category[:]
+        for c, change in self._changes(delta):
+            category[c] += change
+        breakdown = {name: round(value, 2) for name, value in zip(CATEGORIES, category)}
+        return round(sum(category), 2), breakdown
+
+    def savings(self, delta):
+        """kg CO₂/year saved by a delta (negative when it adds emissions)"""
+        return -sum(change for _, change in self._changes(delta))
+
+    def delta_matrix(self, deltas):
+        """Stack sparse deltas into a dense (scenarios x activities) array"""
+        matrix = np.zeros((len(deltas), len(ACTIVITY_NAMES)))
+        for row, delta in enumerate(deltas):
+            for name, change in delta.items():
+                matrix[row, ACTIVITY_INDEX[name]] += change
+        return matrix
+
+    def evaluate_many(self, deltas):
+        """Unrounded totals and (scenarios x categories) breakdowns for a list of
+        deltas or a delta matrix"""
+        matrix = deltas if isinstance(deltas, np.ndarray) else self.delta_matrix(deltas)
+        change = np.maximum(matrix, -self.activity) * self.coefficient
+        category = self.category + np.add.reduceat(change[:, _CATEGORY_ORDER], _CATEGORY_STARTS, axis=1)
+        return category.sum(axis=1), category
+
+    # ─── Common interventions, expressed as deltas against this baseline ──────
+    def shift(self, sources, target, amount=None):
+        """Move up to `amount` (default: all) of the source activities, in order, to target"""
+        if isinstance(sources, str):
+            sources = [sources]
+        remaining = float("inf") if amount is None else amount
+        delta = {}
+        for name in sources:
+            moved = min(float(self.activity[ACTIVITY_INDEX[name]]), remaining)
+            if moved > 0:
+                delta[name] = -moved
+                delta[target] = delta.get(target, 0.0) + moved
+                remaining -= moved
+        return delta
+
+    def solar(self, kw):
+        """Rooftop solar of `kw` kilowatts offsetting grid electricity"""
+        return {"electricity_kwh": -kw * SOLAR_KWH_PER_KW_MONTH}
+
+
+# Column order grouping activities by category, for the reduceat in evaluate_many
+_CATEGORY_ORDER = np.argsort(ACTIVITY_CATEGORY, kind="stable")
+_CATEGORY_STARTS = np.searchsorted(ACTIVITY_CATEGORY[_CATEGORY_ORDER], np.arange(len(CATEGORIES)))